@@ -657,6 +657,11 @@ const ProfilePage = () => {
         new_password: passwordForm.newPassword
       });
       
+      // Other sessions are signed out; keep this one with the new token
+      if (response.data?.access_token) {
+        localStorage.setItem('token', response.data.access_token);
+      }
+      
       setPasswordSuccess('Password updated successfully');
       setPasswordForm({
         currentPassword: '',
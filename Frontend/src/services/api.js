@@ -214,6 +214,40 @@ export const eventAPI = {
     }
     const response = await api.get(`/events?category=${category}`);
     return response.data;
+  },
+  
+  searchEvents: async (query, limit = 20) => {
+    const response = await api.get('/events/search', { params: { q: query, limit } });
+    return response.data;
+  },
+  
+  suggestEvents: async (query, limit = 10) => {
+    const response = await api.get('/events/suggest', { params: { q: query, limit } });
+    return response.data;
+  },
+  
+  getUpcomingEvents: async (limit = 10, days = null) => {
+    const params = { limit };
+    if (days) params.days = days;
+    const response = await api.get('/events/upcoming', { params });
+    return response.data;
+  },
+  
+  // filters: { category, location, price, attendees, item_count } with arrays of facet values
+  browseEvents: async (filters = {}, limit = null, afterId = null) => {
+    const params = {};
+    Object.entries(filters).forEach(([facet, values]) => {
+      if (values && values.length) {
+        params[facet] = values.join(',');
+      }
+    });
+    if (limit) params.limit = limit;
+    if (afterId) params.after_id = afterId;
+    const response = await api.get('/events/browse', { params });
+    return {
+      ...response.data,
+      nextAfterId: response.headers['x-next-after-id'] || null
+    };
   }
 };
 
@@ -272,6 +306,17 @@ export const cartAPI = {
       console.error('Error clearing cart:', error);
       throw error;
     }
+  },
+  
+  // operations: [{ op: 'add' | 'update' | 'remove', event_id, item_id, quantity, custom_price, customized_items }]
+  batchUpdateCart: async (operations) => {
+    try {
+      const response = await api.post('/cart/batch', { operations });
+      return response.data;
+    } catch (error) {
+      console.error('Error updating cart:', error);
+      throw error;
+    }
   }
 };
 
@@ -154,7 +154,7 @@ export const isAuthenticated = async () => {
     initializeAuth(token);
 
     // Make sure we're sending JSON with the right content type
-    const response = await api.post('/auth/verify-token', 
+    const response = await api.post('/auth/verify-token?minimal=1', 
       { token }, 
       { 
         headers: { 
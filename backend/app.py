@@ -1,6 +1,7 @@
 from flask import Flask, jsonify, request, make_response
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from werkzeug.middleware.proxy_fix import ProxyFix
 from datetime import timedelta
 import os
 import sys
@@ -43,10 +44,24 @@ from routes.admin import admin_bp
 from routes.cart import cart_bp
 from routes.dashboard import dashboard_bp
 from routes.users import users_bp
+from services.admin_snapshots import admin_snapshots
+from services.event_search import create_search_index, rebuild_search_index
+from services.event_suggest import event_suggestions
+from services.current_user import load_user
+from services.auth_tokens import token_is_revoked
+from services.passwords import password_hasher, PasswordHasherBusy
 
 
 app = Flask(__name__)
 
+# Behind a reverse proxy every request comes from the proxy's address. Trust
+# this many X-Forwarded-For hops so request.remote_addr is the real client,
+# which the per-IP login rate limits key on. Leave at 0 when clients connect
+# directly, or they could spoof their address with the header.
+trusted_proxy_hops = int(os.getenv('TRUSTED_PROXY_HOPS', 0))
+if trusted_proxy_hops:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxy_hops)
+
 # Configure CORS to properly handle all origins during development
 # Note: With credentials enabled, we must specify explicit origins (not wildcards)
 
@@ -73,10 +88,10 @@ def after_request(response):
     if origin and origin in allowed_origins:
         # Replace any existing headers to avoid duplicates
         response.headers.set('Access-Control-Allow-Origin', origin)
-        response.headers.set('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Requested-With')
+        response.headers.set('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Requested-With, If-None-Match')
         response.headers.set('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
         response.headers.set('Access-Control-Allow-Credentials', 'true')
-        response.headers.set('Access-Control-Expose-Headers', 'Content-Type, Authorization')
+        response.headers.set('Access-Control-Expose-Headers', 'Content-Type, Content-Disposition, Authorization, ETag, X-Next-After-Id, X-Next-Cursor, X-Snapshot-Age')
     
     return response
 
@@ -90,10 +105,10 @@ def handle_preflight():
         # If the request origin is in our list of allowed origins
         if origin and origin in allowed_origins:
             response.headers.set('Access-Control-Allow-Origin', origin)
-            response.headers.set('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Requested-With')
+            response.headers.set('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Requested-With, If-None-Match')
             response.headers.set('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
             response.headers.set('Access-Control-Allow-Credentials', 'true')
-            response.headers.set('Access-Control-Expose-Headers', 'Content-Type, Authorization')
+            response.headers.set('Access-Control-Expose-Headers', 'Content-Type, Content-Disposition, Authorization, ETag, X-Next-After-Id, X-Next-Cursor, X-Snapshot-Age')
         
         return response
 
@@ -111,6 +126,8 @@ app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
 # Initialize extensions
 db.init_app(app)
 jwt = JWTManager(app)
+admin_snapshots.init_app(app)
+event_suggestions.init_app(app)
 
 # JWT error handlers
 @jwt.expired_token_loader
@@ -137,6 +154,44 @@ def missing_token_callback(error):
         'error': 'authorization_required'
     }), 401
 
+# Load the authenticated user once per request from a short-TTL cache;
+# routes read it through flask_jwt_extended.current_user
+@jwt.user_lookup_loader
+def user_lookup_callback(jwt_header, jwt_payload):
+    return load_user(jwt_payload['sub'])
+
+# Tokens carry the user's token version; bumping it revokes older tokens
+@jwt.token_in_blocklist_loader
+def check_token_version(jwt_header, jwt_payload):
+    return token_is_revoked(jwt_payload, load_user(jwt_payload['sub']))
+
+@jwt.revoked_token_loader
+def revoked_token_callback(jwt_header, jwt_payload):
+    return jsonify({
+        'success': False,
+        'message': 'The token has been revoked',
+        'error': 'token_revoked'
+    }), 401
+
+@jwt.user_lookup_error_loader
+def user_lookup_error_callback(jwt_header, jwt_payload):
+    return jsonify({
+        'success': False,
+        'message': 'User not found',
+        'error': 'user_not_found'
+    }), 401
+
+# Too many logins or signups at once: ask the client to retry instead of queueing forever
+@app.errorhandler(PasswordHasherBusy)
+def password_hasher_busy(error):
+    response = jsonify({
+        'success': False,
+        'message': 'The server is busy, please try again shortly',
+        'error': 'server_busy'
+    })
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(events_bp, url_prefix='/api/events')
@@ -156,4 +211,12 @@ if __name__ == '__main__':
         # Create tables if they don't exist (don't drop existing tables)
         db.create_all()
         print("Database tables have been initialized!")
+        # The search table is dialect specific, so it isn't part of create_all()
+        if create_search_index():
+            rebuild_search_index()
+    event_suggestions.warm()
+    # Spawned hashing workers would each re-import this script and rebuild
+    # the app, so the development server hashes inline unless told otherwise
+    if 'PASSWORD_HASH_WORKERS' not in os.environ:
+        password_hasher.configure(workers=0)
     app.run(debug=True, port=5000)
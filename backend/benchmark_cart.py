@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Count the SQL queries issued by GET /api/cart for carts of growing size.
+
+Runs against a throwaway in-memory SQLite database, so it never touches the
+configured DATABASE_URL.
+"""
+
+import os
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+
+import time
+from sqlalchemy import event as sa_event
+from flask_jwt_extended import create_access_token
+from app import app
+from models import db, User, Event, Cart, CartItem
+
+CART_SIZES = [1, 5, 20, 50]
+
+def benchmark_cart():
+    with app.app_context():
+        db.create_all()
+        
+        user = User(email='bench@example.com', first_name='Bench', last_name='User', phone='0000000000')
+        user.set_password('password123')
+        db.session.add(user)
+        events = [
+            Event(title=f'Event {i}', description='Benchmark event', location='Bengaluru',
+                  date='June 30, 2025', category='birthday', price=100.0 + i)
+            for i in range(max(CART_SIZES))
+        ]
+        db.session.add_all(events)
+        db.session.commit()
+        
+        cart = Cart(user_id=user.id)
+        db.session.add(cart)
+        db.session.commit()
+        
+        cart_id = cart.id
+        event_prices = [(event.id, event.price) for event in events]
+        token = create_access_token(identity=str(user.id))
+        headers = {'Authorization': f'Bearer {token}'}
+        
+        statements = []
+        
+        @sa_event.listens_for(db.engine, 'before_cursor_execute')
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        client = app.test_client()
+        print(f"{'items':>6} {'queries':>8} {'ms':>8}")
+        
+        for size in CART_SIZES:
+            CartItem.query.filter_by(cart_id=cart_id).delete()
+            for event_id, price in event_prices[:size]:
+                db.session.add(CartItem(cart_id=cart_id, event_id=event_id, quantity=1, price=price))
+            db.session.commit()
+            db.session.expunge_all()
+            
+            statements.clear()
+            start = time.perf_counter()
+            response = client.get('/api/cart', headers=headers)
+            elapsed = (time.perf_counter() - start) * 1000
+            
+            assert response.status_code == 200
+            assert len(response.get_json()['items']) == size
+            print(f"{size:>6} {len(statements):>8} {elapsed:>8.2f}")
+
+if __name__ == "__main__":
+    benchmark_cart()
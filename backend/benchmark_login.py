@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Measure POST /api/auth/login throughput for each password hashing setup.
+
+Runs concurrent logins against a throwaway SQLite database for every
+combination of hashing method and pool size, and reports logins/sec and
+logins/sec per core given to hashing (the pool size, or every core when
+hashing runs inline on the request threads).
+"""
+
+import os
+import tempfile
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'benchmark_login.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+# Measure hashing throughput, not the login throttle
+os.environ['RATE_LIMIT_ENABLED'] = 'false'
+
+import threading
+import time
+from app import app
+from models import db, User
+from services.passwords import password_hasher
+
+METHODS = ['pbkdf2:sha256:600000', 'scrypt:32768:8:1']
+CPU_COUNT = os.cpu_count() or 1
+WORKER_COUNTS = sorted({0, CPU_COUNT})
+CONCURRENCY = 8
+DURATION = 5
+
+def run_logins(payload):
+    """Log in from CONCURRENCY threads for DURATION seconds, returning (ok, failed)"""
+    counts = {'ok': 0, 'failed': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + DURATION
+    
+    def worker():
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            response = client.post('/api/auth/login', json=payload)
+            with lock:
+                counts['ok' if response.status_code == 200 else 'failed'] += 1
+    
+    threads = [threading.Thread(target=worker) for _ in range(CONCURRENCY)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts['ok'], counts['failed']
+
+def benchmark_login():
+    with app.app_context():
+        db.create_all()
+        password_hasher.configure(workers=0)
+        
+        user = User(email='bench@example.com', first_name='Bench', last_name='User', phone='0000000000')
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.commit()
+    
+    payload = {'email': 'bench@example.com', 'password': 'password123'}
+    
+    print(f"{CPU_COUNT} cores, {CONCURRENCY} concurrent clients, {DURATION}s per run")
+    print(f"{'method':<24} {'workers':>7} {'logins/s':>9} {'per core':>9} {'failed':>7}")
+    
+    for method in METHODS:
+        for workers in WORKER_COUNTS:
+            password_hasher.configure(method=method, workers=workers)
+            
+            # Hash with the method under test so logins don't trigger a rehash
+            with app.app_context():
+                user = User.query.filter_by(email=payload['email']).first()
+                user.set_password(payload['password'])
+                db.session.commit()
+            
+            # Warm the pool so worker start-up isn't part of the run
+            app.test_client().post('/api/auth/login', json=payload)
+            
+            ok, failed = run_logins(payload)
+            rate = ok / DURATION
+            cores = workers or CPU_COUNT
+            print(f"{method:<24} {workers or 'inline':>7} {rate:>9.1f} {rate / cores:>9.1f} {failed:>7}")
+    
+    password_hasher.shutdown()
+
+if __name__ == "__main__":
+    benchmark_login()
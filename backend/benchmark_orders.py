@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Measure POST /api/orders latency and query count for growing order sizes.
+
+Runs against a throwaway in-memory SQLite database, so it never touches the
+configured DATABASE_URL.
+"""
+
+import os
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+
+import time
+from sqlalchemy import event as sa_event
+from flask_jwt_extended import create_access_token
+from app import app
+from models import db, User, Event
+
+LINE_COUNTS = [1, 10, 100]
+ROUNDS = 20
+
+def benchmark_orders():
+    with app.app_context():
+        db.create_all()
+        
+        user = User(email='bench@example.com', first_name='Bench', last_name='User', phone='0000000000')
+        user.set_password('password123')
+        db.session.add(user)
+        events = [
+            Event(title=f'Event {i}', description='Benchmark event', location='Bengaluru',
+                  date='June 30, 2025', category='birthday', price=100.0 + i)
+            for i in range(max(LINE_COUNTS))
+        ]
+        db.session.add_all(events)
+        db.session.commit()
+        
+        event_ids = [event.id for event in events]
+        token = create_access_token(identity=str(user.id))
+        headers = {'Authorization': f'Bearer {token}'}
+        
+        statements = []
+        
+        @sa_event.listens_for(db.engine, 'before_cursor_execute')
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        client = app.test_client()
+        print(f"{'lines':>6} {'queries':>8} {'avg ms':>8}")
+        
+        for line_count in LINE_COUNTS:
+            payload = {
+                'items': [{'event_id': event_id, 'quantity': 2} for event_id in event_ids[:line_count]],
+                'shipping_address': '1 MG Road',
+                'shipping_city': 'Bengaluru',
+                'shipping_state': 'Karnataka',
+                'shipping_pincode': '560001',
+                'payment_method': 'card'
+            }
+            
+            elapsed = 0
+            for _ in range(ROUNDS):
+                statements.clear()
+                start = time.perf_counter()
+                response = client.post('/api/orders', json=payload, headers=headers)
+                elapsed += time.perf_counter() - start
+                assert response.status_code == 201
+                assert len(response.get_json()['items']) == line_count
+            
+            print(f"{line_count:>6} {len(statements):>8} {elapsed / ROUNDS * 1000:>8.2f}")
+
+if __name__ == "__main__":
+    benchmark_orders()
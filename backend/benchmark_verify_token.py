@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Measure POST /api/auth/verify-token latency and query count under load.
+
+Runs concurrent verifications of a pool of user tokens, in full and
+?minimal=1 mode, against a throwaway in-memory SQLite database, and reports
+queries per request and latency percentiles for cold and warm caches.
+"""
+
+import os
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+
+import threading
+import time
+from sqlalchemy import event as sa_event
+from app import app
+from models import db, User
+from services.auth_tokens import issue_access_token
+from services.current_user import user_cache, profile_cache
+
+USER_COUNT = 50
+CONCURRENCY = 8
+REQUESTS_PER_THREAD = 250
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+def run_load(url, tokens):
+    """Verify tokens from CONCURRENCY threads, returning per-request latencies in ms"""
+    latencies = []
+    lock = threading.Lock()
+    
+    def worker(offset):
+        client = app.test_client()
+        local = []
+        for i in range(REQUESTS_PER_THREAD):
+            token = tokens[(offset + i) % len(tokens)]
+            start = time.perf_counter()
+            response = client.post(url, json={'token': token})
+            local.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200 and response.get_json()['valid']
+        with lock:
+            latencies.extend(local)
+    
+    threads = [threading.Thread(target=worker, args=(n * 7,)) for n in range(CONCURRENCY)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - started
+
+def benchmark_verify_token():
+    with app.app_context():
+        db.create_all()
+        
+        users = []
+        for i in range(USER_COUNT):
+            user = User(email=f'bench{i}@example.com', first_name='Bench', last_name=f'User {i}',
+                        phone='0000000000')
+            # A precomputed hash keeps setup fast; logins aren't part of this benchmark
+            user.password_hash = 'pbkdf2:sha256:1$salt$0'
+            users.append(user)
+        db.session.add_all(users)
+        db.session.commit()
+        tokens = [issue_access_token(user) for user in users]
+        
+        statements = []
+        
+        @sa_event.listens_for(db.engine, 'before_cursor_execute')
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+    
+    total = CONCURRENCY * REQUESTS_PER_THREAD
+    print(f"{USER_COUNT} users, {CONCURRENCY} concurrent clients, {total} requests per run")
+    print(f"{'mode':<16} {'queries/req':>11} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    
+    for label, url in (('full', '/api/auth/verify-token'), ('minimal', '/api/auth/verify-token?minimal=1')):
+        user_cache.clear()
+        profile_cache.clear()
+        for phase in ('cold', 'warm'):
+            statements.clear()
+            latencies, elapsed = run_load(url, tokens)
+            print(f"{label + ' ' + phase:<16} {len(statements) / total:>11.2f} "
+                  f"{percentile(latencies, 0.5):>8.2f} {percentile(latencies, 0.95):>8.2f} "
+                  f"{percentile(latencies, 0.99):>8.2f} {total / elapsed:>8.0f}")
+
+if __name__ == "__main__":
+    benchmark_verify_token()
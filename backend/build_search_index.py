@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+
+from app import app, db
+from services.event_search import rebuild_search_index
+
+def build_search_index():
+    """Create the full-text search table (tsvector + GIN on PostgreSQL, FTS5 on SQLite) and index every event"""
+    with app.app_context():
+        try:
+            count = rebuild_search_index()
+            print(f"✅ Indexed {count} events for search")
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+            db.session.rollback()
+
+if __name__ == "__main__":
+    build_search_index()
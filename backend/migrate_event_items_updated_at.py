@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+
+from app import app, db
+from sqlalchemy import text, inspect
+
+def add_event_items_updated_at():
+    """Add the updated_at column used for event ETags to the event_items table"""
+    with app.app_context():
+        try:
+            columns = [column['name'] for column in inspect(db.engine).get_columns('event_items')]
+            
+            if 'updated_at' in columns:
+                print("Column 'updated_at' already exists in event_items table")
+                return
+            
+            with db.engine.connect() as conn:
+                conn.execute(text("""
+                    ALTER TABLE event_items 
+                    ADD COLUMN updated_at TIMESTAMP
+                """))
+                
+                # Existing items start at the current time
+                conn.execute(text("""
+                    UPDATE event_items 
+                    SET updated_at = CURRENT_TIMESTAMP 
+                    WHERE updated_at IS NULL
+                """))
+                
+                conn.commit()
+                
+            print("✅ Successfully added 'updated_at' column to event_items table")
+            
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+            db.session.rollback()
+
+if __name__ == "__main__":
+    add_event_items_updated_at()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+from app import app, db
+from models import Event, parse_event_date
+from sqlalchemy import text, inspect
+
+def add_event_starts_at():
+    """Add the indexed starts_at column to events and backfill it from the date strings.
+
+    Safe to rerun: the column and index are only created when missing, and
+    events whose starts_at already matches their date are left untouched.
+    """
+    with app.app_context():
+        try:
+            columns = [column['name'] for column in inspect(db.engine).get_columns('events')]
+            
+            if 'starts_at' not in columns:
+                with db.engine.connect() as conn:
+                    conn.execute(text("""
+                        ALTER TABLE events 
+                        ADD COLUMN starts_at TIMESTAMP
+                    """))
+                    conn.commit()
+                print("✅ Added 'starts_at' column to events table")
+            else:
+                print("Column 'starts_at' already exists in events table")
+            
+            for index in Event.__table__.indexes:
+                index.create(db.engine, checkfirst=True)
+            
+            # Parse the existing free-form dates; anything unparseable stays NULL.
+            # Only rows whose starts_at is missing or stale are written, since
+            # every write bumps updated_at and with it the event's ETag and
+            # cached detail.
+            rows = db.session.query(Event.id, Event.date, Event.starts_at).all()
+            parsed_dates = {event_id: parse_event_date(date) for event_id, date, _ in rows}
+            updates = [
+                {'id': event_id, 'starts_at': parsed_dates[event_id]}
+                for event_id, _, starts_at in rows
+                if parsed_dates[event_id] != starts_at
+            ]
+            if updates:
+                db.session.bulk_update_mappings(Event, updates)
+                db.session.commit()
+            
+            print(f"✅ Backfilled starts_at for {len(updates)} events "
+                  f"({len(rows) - len(updates)} already up to date)")
+            
+            unparsed = sorted({date for event_id, date, _ in rows if parsed_dates[event_id] is None})
+            if unparsed:
+                print(f"Left without a start time: {', '.join(unparsed)}")
+            
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+            db.session.rollback()
+
+if __name__ == "__main__":
+    add_event_starts_at()
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+
+from app import app, db
+from models import User
+
+def add_user_search_indexes():
+    """Create the prefix search indexes declared on the users table"""
+    with app.app_context():
+        try:
+            for index in User.__table__.indexes:
+                # checkfirst skips indexes that already exist
+                index.create(db.engine, checkfirst=True)
+                print(f"✅ Index {index.name} is in place")
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+if __name__ == "__main__":
+    add_user_search_indexes()
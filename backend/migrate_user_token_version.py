@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+
+from app import app, db
+from sqlalchemy import text, inspect
+
+def add_user_token_version():
+    """Add the token_version column used to revoke issued access tokens"""
+    with app.app_context():
+        try:
+            columns = [column['name'] for column in inspect(db.engine).get_columns('users')]
+            
+            if 'token_version' in columns:
+                print("Column 'token_version' already exists in users table")
+                return
+            
+            with db.engine.connect() as conn:
+                # Existing tokens have no version claim, which counts as 0
+                conn.execute(text("""
+                    ALTER TABLE users 
+                    ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0
+                """))
+                conn.commit()
+                
+            print("✅ Successfully added 'token_version' column to users table")
+            
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+            db.session.rollback()
+
+if __name__ == "__main__":
+    add_user_token_version()
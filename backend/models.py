@@ -1,5 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import validates
+from services.passwords import password_hasher
 from datetime import datetime, timedelta
 import uuid
 import secrets
@@ -17,6 +18,7 @@ class User(db.Model):
     phone = db.Column(db.String(20), nullable=False)  # Changed to required
     terms_agreed = db.Column(db.Boolean, default=False, nullable=False)  # Added for terms agreement
     is_admin = db.Column(db.Boolean, default=False)
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Bumped to revoke issued tokens
     
     # Email verification removed - all users are automatically verified
     
@@ -26,12 +28,27 @@ class User(db.Model):
     # Relationships
     orders = db.relationship('Order', backref='user', lazy=True)
     cart = db.relationship('Cart', backref='user', lazy=True, uselist=False)
+    stats = db.relationship('UserStats', backref='user', lazy=True, uselist=False, cascade='all, delete-orphan')
+    
+    # Indexes backing the admin user prefix search; text_pattern_ops lets
+    # PostgreSQL use them for LIKE 'prefix%' under any collation
+    __table_args__ = (
+        db.Index('ix_users_email_lower', db.func.lower(email).label('email_lower'),
+                 postgresql_ops={'email_lower': 'text_pattern_ops'}),
+        db.Index('ix_users_first_name_lower', db.func.lower(first_name).label('first_name_lower'),
+                 postgresql_ops={'first_name_lower': 'text_pattern_ops'}),
+        db.Index('ix_users_last_name_lower', db.func.lower(last_name).label('last_name_lower'),
+                 postgresql_ops={'last_name_lower': 'text_pattern_ops'}),
+        db.Index('ix_users_phone', phone, postgresql_ops={'phone': 'text_pattern_ops'}),
+        # Signup counts and rollup rebuilds scan users by creation time
+        db.Index('ix_users_created_at', created_at),
+    )
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
         
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
     
     def to_dict(self):
         return {
@@ -48,6 +65,26 @@ class User(db.Model):
     # Email verification methods removed
 
 
+class UserStats(db.Model):
+    """Per-user order totals, kept in step with the orders table on every order write"""
+    __tablename__ = 'user_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    total_orders = db.Column(db.Integer, nullable=False, default=0)
+    pending_orders = db.Column(db.Integer, nullable=False, default=0)
+    total_spent = db.Column(db.Float, nullable=False, default=0.0)  # Excludes cancelled orders
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'total_orders': self.total_orders,
+            'pending_orders': self.pending_orders,
+            'total_spent': self.total_spent,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
 class PendingUser(db.Model):
     """Temporary storage for users pending email verification"""
     __tablename__ = 'pending_users'
@@ -71,7 +108,7 @@ class PendingUser(db.Model):
         self.expires_at = datetime.utcnow() + timedelta(hours=24)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def is_expired(self):
         return datetime.utcnow() > self.expires_at
@@ -89,6 +126,33 @@ class PendingUser(db.Model):
         return user
 
 
+# Formats accepted in Event.date, tried in order
+EVENT_DATE_FORMATS = (
+    '%Y-%m-%d',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%dT%H:%M',
+    '%Y-%m-%dT%H:%M:%S',
+    '%B %d, %Y',
+    '%b %d, %Y',
+    '%B %d %Y',
+    '%d %B %Y',
+    '%d %b %Y',
+    '%d %b, %Y',
+    '%d/%m/%Y',
+)
+
+def parse_event_date(value):
+    """Parse an event's free-form date string, or None for values like "Customizable" """
+    if not value:
+        return None
+    value = ' '.join(value.split())
+    for date_format in EVENT_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    return None
+
 class Event(db.Model):
     __tablename__ = 'events'
     
@@ -98,6 +162,7 @@ class Event(db.Model):
     image_url = db.Column(db.String(255), nullable=True)
     location = db.Column(db.String(100), nullable=False)
     date = db.Column(db.String(50), nullable=False)  # Storing as string for flexibility
+    starts_at = db.Column(db.DateTime, nullable=True, index=True)  # Parsed from date, None when it isn't a date
     category = db.Column(db.String(50), nullable=False)
     attendees = db.Column(db.String(50), nullable=True)
     items = db.Column(db.Integer, nullable=True)
@@ -109,6 +174,17 @@ class Event(db.Model):
     # Relationships
     event_items = db.relationship('EventItem', backref='event', lazy=True, cascade='all, delete-orphan')
     
+    # The catalog listing filters on category and pages by id
+    __table_args__ = (
+        db.Index('ix_events_category_id', category, id),
+    )
+    
+    @validates('date')
+    def validate_date(self, key, value):
+        # Keep starts_at in step with every write to the display date
+        self.starts_at = parse_event_date(value)
+        return value
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -117,6 +193,7 @@ class Event(db.Model):
             'image_url': self.image_url,
             'location': self.location,
             'date': self.date,
+            'starts_at': self.starts_at.isoformat() if self.starts_at else None,
             'category': self.category,
             'attendees': self.attendees,
             'items': self.items,
@@ -124,18 +201,31 @@ class Event(db.Model):
             'delivery_options': self.delivery_options,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+    
+    def to_summary_dict(self):
+        """Slim projection embedded in carts and other per-item payloads"""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'image_url': self.image_url,
+            'location': self.location,
+            'date': self.date,
+            'category': self.category,
+            'price': self.price
+        }
 
 class EventItem(db.Model):
     __tablename__ = 'event_items'
     
     id = db.Column(db.Integer, primary_key=True)
-    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
     quantity = db.Column(db.Integer, nullable=False, default=1)
     price = db.Column(db.Float, nullable=False, default=0.0)
     image_url = db.Column(db.String(255), nullable=True)
     category = db.Column(db.String(50), nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
         return {
@@ -169,6 +259,14 @@ class Order(db.Model):
     # Relationships
     order_items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
     
+    # Order history pages by (created_at, id) per user; the admin list and
+    # exports filter on status and sort or range-scan on created_at
+    __table_args__ = (
+        db.Index('ix_orders_user_created', user_id, created_at.desc(), id.desc()),
+        db.Index('ix_orders_status_created', status, created_at),
+        db.Index('ix_orders_created_at', created_at, id),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -190,8 +288,8 @@ class OrderItem(db.Model):
     __tablename__ = 'order_items'
     
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
-    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, index=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False, index=True)
     event_title = db.Column(db.String(100), nullable=False)
     price = db.Column(db.Float, nullable=False)
     quantity = db.Column(db.Integer, nullable=False, default=1)
@@ -210,7 +308,7 @@ class PasswordReset(db.Model):
     __tablename__ = 'password_resets'
     
     id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String(120), nullable=False)
+    email = db.Column(db.String(120), nullable=False, index=True)
     token = db.Column(db.String(100), nullable=False, unique=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     expires_at = db.Column(db.DateTime, nullable=False)
@@ -220,7 +318,7 @@ class Cart(db.Model):
     __tablename__ = 'carts'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -242,7 +340,7 @@ class CartItem(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     cart_id = db.Column(db.Integer, db.ForeignKey('carts.id'), nullable=False)
-    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False, default=1)
     price = db.Column(db.Float, nullable=False)
     customized_items = db.Column(db.Text, nullable=True)  # JSON string of customized items
@@ -251,11 +349,16 @@ class CartItem(db.Model):
     # Relationships
     event = db.relationship('Event')
     
+    # An event appears at most once per cart; also serves lookups by cart_id
+    __table_args__ = (
+        db.Index('uq_cart_items_cart_event', cart_id, event_id, unique=True),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
             'event_id': self.event_id,
-            'event': self.event.to_dict() if self.event else None,
+            'event': self.event.to_summary_dict() if self.event else None,
             'quantity': self.quantity,
             'price': self.price,
             'total': self.price * self.quantity,
@@ -266,7 +369,7 @@ class PaymentMethod(db.Model):
     __tablename__ = 'payment_methods'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     card_type = db.Column(db.String(50), nullable=False)  # Visa, Mastercard, etc.
     last_four = db.Column(db.String(4), nullable=False)  # Last 4 digits of card
     expiry_month = db.Column(db.String(2), nullable=False)
@@ -293,7 +396,7 @@ class Address(db.Model):
     __tablename__ = 'addresses'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     address_line = db.Column(db.String(200), nullable=False)
     city = db.Column(db.String(100), nullable=False)
     state = db.Column(db.String(100), nullable=False)
@@ -345,3 +448,45 @@ class Wishlist(db.Model):
         }
 
 
+
+
+# Daily rollups feeding the admin analytics and dashboard. They are kept up
+# to date on order and user writes (see services/rollups.py) and can be
+# rebuilt from scratch with rebuild_rollups.py.
+
+class DailyRevenue(db.Model):
+    __tablename__ = 'daily_revenue'
+    
+    day = db.Column(db.Date, primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)  # All orders placed that day
+    revenue = db.Column(db.Float, nullable=False, default=0.0)  # Excludes cancelled orders
+
+class DailyOrderStatus(db.Model):
+    __tablename__ = 'daily_order_status'
+    
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+
+class DailyCategorySales(db.Model):
+    __tablename__ = 'daily_category_sales'
+    
+    day = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)  # Order lines, excluding cancelled orders
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+class DailyEventSales(db.Model):
+    __tablename__ = 'daily_event_sales'
+    
+    day = db.Column(db.Date, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)  # All order lines
+    active_order_count = db.Column(db.Integer, nullable=False, default=0)  # Excluding cancelled orders
+    revenue = db.Column(db.Float, nullable=False, default=0.0)  # Excluding cancelled orders
+
+class DailySignups(db.Model):
+    __tablename__ = 'daily_signups'
+    
+    day = db.Column(db.Date, primary_key=True)
+    signups = db.Column(db.Integer, nullable=False, default=0)  # Non-admin users
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+
+from app import app, db
+from services.rollups import rebuild_rollups as rebuild_all_rollups
+
+def rebuild_rollups():
+    """Create the daily rollup tables if needed and backfill them from orders and users"""
+    with app.app_context():
+        try:
+            db.create_all()
+            count = rebuild_all_rollups()
+            db.session.commit()
+            print(f"✅ Rebuilt daily rollups ({count} rows)")
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+            db.session.rollback()
+
+if __name__ == "__main__":
+    rebuild_rollups()
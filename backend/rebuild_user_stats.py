@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+
+from app import app, db
+from services.user_stats import rebuild_all_user_stats
+
+def rebuild_user_stats():
+    """Create the user_stats table if needed and backfill it from orders"""
+    with app.app_context():
+        try:
+            db.create_all()
+            count = rebuild_all_user_stats()
+            db.session.commit()
+            print(f"✅ Rebuilt order stats for {count} users")
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+            db.session.rollback()
+
+if __name__ == "__main__":
+    rebuild_user_stats()
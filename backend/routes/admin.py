@@ -1,129 +1,137 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from services.auth_tokens import admin_required
 from models import db, User, Event, EventItem, Order, OrderItem
+from services.catalog import event_changed
+from services.user_stats import record_order_status_change
+from services.rollups import rollup_order_status_change
+from services.admin_snapshots import admin_snapshots, build_dashboard_payload, build_analytics_payload
+from services.admin_orders import list_orders, ORDER_SORTS
+from services.admin_users import list_users
+from services.admin_export import export_orders, export_users, EXPORT_FORMATS
 from datetime import datetime, timedelta
-from sqlalchemy import func, extract
 
 admin_bp = Blueprint('admin', __name__)
 
-# Helper function to check if user is admin
-def is_admin(user_id):
-    user = User.query.get(user_id)
-    return user and user.is_admin
+def parse_date_param(name, end_of_day=False):
+    """Parse an ISO date or datetime query parameter, raising ValueError if malformed.
+
+    A bare date used as an upper bound covers that whole day.
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an ISO date')
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+def export_response(rows, name, export_format):
+    """Stream an export generator as a file download"""
+    filename = f"{name}-{datetime.utcnow().strftime('%Y%m%d')}.{export_format}"
+    return Response(
+        stream_with_context(rows),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+def parse_order_filters():
+    """Admin order filters from the query string, shared by listing and export"""
+    return {
+        'statuses': [status for status in request.args.get('status', '').split(',') if status],
+        'date_from': parse_date_param('date_from'),
+        'date_to': parse_date_param('date_to', end_of_day=True),
+        'email_prefix': request.args.get('email'),
+        'min_total': request.args.get('min_total', type=float),
+        'max_total': request.args.get('max_total', type=float)
+    }
 
 @admin_bp.route('/dashboard', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_dashboard_data():
-    user_id = get_jwt_identity()
-    
-    if not is_admin(user_id):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
-    # Get counts for dashboard
-    totalUsers = User.query.filter_by(is_admin=False).count()
-    totalEvents = Event.query.count()
-    totalOrders = Order.query.count()
-    
-    # Calculate total revenue
-    totalRevenue = db.session.query(db.func.sum(Order.total_amount)).filter(
-        Order.status != 'cancelled'
-    ).scalar() or 0
-    
-    # Get recent orders with user information
-    recent_orders_query = db.session.query(Order, User).join(User, Order.user_id == User.id).order_by(Order.created_at.desc()).limit(5).all()
-    recent_orders = []
-    for order, user in recent_orders_query:
-        order_dict = order.to_dict()
-        order_dict['user'] = {
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'email': user.email
-        }
-        recent_orders.append(order_dict)
-    
-    # Get order status distribution
-    ordersByStatus = {}
-    status_counts = db.session.query(Order.status, db.func.count(Order.id)).group_by(Order.status).all()
-    for status, count in status_counts:
-        ordersByStatus[status] = count
-    
-    # Get top events by order count
-    top_events_query = db.session.query(
-        Event,
-        db.func.count(OrderItem.id).label('order_count')
-    ).outerjoin(OrderItem, Event.id == OrderItem.event_id).group_by(Event.id).order_by(db.func.count(OrderItem.id).desc()).limit(10).all()
-    
-    topEvents = []
-    for event, order_count in top_events_query:
-        event_dict = event.to_dict()
-        event_dict['order_count'] = order_count
-        topEvents.append(event_dict)
-    
-    return jsonify({
-        'totalUsers': totalUsers,
-        'totalEvents': totalEvents,
-        'totalOrders': totalOrders,
-        'totalRevenue': totalRevenue,
-        'recentOrders': recent_orders,
-        'ordersByStatus': ordersByStatus,
-        'topEvents': topEvents
-    }), 200
+    payload, age = admin_snapshots.get(('dashboard',), build_dashboard_payload)
+    
+    response = jsonify(payload)
+    response.headers['X-Snapshot-Age'] = str(int(age))
+    return response, 200
 
 @admin_bp.route('/users', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_all_users():
-    user_id = get_jwt_identity()
-    
-    if not is_admin(user_id):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
-    # Get all non-admin users
-    users = User.query.filter_by(is_admin=False).all()
-    
-    return jsonify([user.to_dict() for user in users]), 200
+    # Search and paginate non-admin users
+    try:
+        users, next_cursor = list_users(
+            q=request.args.get('q', '').strip() or None,
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor')
+        )
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    response = jsonify(users)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
 
 @admin_bp.route('/orders', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_all_orders():
-    user_id = get_jwt_identity()
-    
-    if not is_admin(user_id):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
-    # Get query parameters
-    status = request.args.get('status')
-    
-    # Base query with user information
-    query = db.session.query(Order, User).join(User, Order.user_id == User.id)
-    
-    # Apply status filter if provided
-    if status:
-        query = query.filter(Order.status == status)
-    
-    # Get all orders
-    orders_with_users = query.order_by(Order.created_at.desc()).all()
-    
-    # Format response
-    orders = []
-    for order, user in orders_with_users:
-        order_dict = order.to_dict()
-        order_dict['user'] = {
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'email': user.email
-        }
-        orders.append(order_dict)
-    
-    return jsonify(orders), 200
+    # Parse filters, sorting, pagination and projection
+    try:
+        filters = parse_order_filters()
+        
+        sort = request.args.get('sort', 'created_at')
+        if sort not in ORDER_SORTS:
+            raise ValueError(f'sort must be one of {", ".join(ORDER_SORTS)}')
+        direction = request.args.get('order', 'desc')
+        if direction not in ('asc', 'desc'):
+            raise ValueError('order must be asc or desc')
+        
+        orders, next_cursor = list_orders(
+            **filters,
+            sort=sort,
+            descending=direction == 'desc',
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor'),
+            fields=request.args.get('fields')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    response = jsonify(orders)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
+
+@admin_bp.route('/orders/export', methods=['GET'])
+@admin_required
+def export_all_orders():
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    
+    try:
+        filters = parse_order_filters()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return export_response(export_orders(export_format, **filters), 'orders', export_format)
+
+@admin_bp.route('/users/export', methods=['GET'])
+@admin_required
+def export_all_users():
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    
+    rows = export_users(export_format, q=request.args.get('q', '').strip() or None)
+    return export_response(rows, 'users', export_format)
 
 @admin_bp.route('/orders/<int:order_id>/status', methods=['PUT'])
-@jwt_required()
+@admin_required
 def update_order_status(order_id):
-    user_id = get_jwt_identity()
-    
-    if not is_admin(user_id):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     data = request.get_json()
     
     if not data.get('status'):
@@ -141,19 +149,20 @@ def update_order_status(order_id):
         return jsonify({'error': 'Order not found'}), 404
     
     # Update order status
+    old_status = order.status
     order.status = data['status']
+    record_order_status_change(order, old_status)
+    rollup_order_status_change(order, old_status)
     db.session.commit()
     
+    # Let the next dashboard read kick off a refresh with the new status
+    admin_snapshots.mark_stale()
+    
     return jsonify(order.to_dict()), 200
 
 @admin_bp.route('/create-admin', methods=['POST'])
-@jwt_required()
+@admin_required
 def create_admin():
-    user_id = get_jwt_identity()
-    
-    if not is_admin(user_id):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     data = request.get_json()
     
     # Validate required fields
@@ -181,13 +190,8 @@ def create_admin():
     return jsonify(new_admin.to_dict()), 201
 
 @admin_bp.route('/events', methods=['POST'])
-@jwt_required()
+@admin_required
 def create_event():
-    user_id = get_jwt_identity()
-    
-    if not is_admin(user_id):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     data = request.get_json()
     
     # Validate required fields
@@ -212,16 +216,13 @@ def create_event():
     db.session.add(new_event)
     db.session.commit()
     
+    event_changed(new_event.id)
+    
     return jsonify(new_event.to_dict()), 201
 
 @admin_bp.route('/events/<int:event_id>', methods=['PUT'])
-@jwt_required()
+@admin_required
 def update_event(event_id):
-    user_id = get_jwt_identity()
-    
-    if not is_admin(user_id):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     event = Event.query.get(event_id)
     
     if not event:
@@ -252,16 +253,13 @@ def update_event(event_id):
     event.updated_at = datetime.utcnow()
     db.session.commit()
     
+    event_changed(event_id)
+    
     return jsonify(event.to_dict()), 200
 
 @admin_bp.route('/events/<int:event_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_event(event_id):
-    user_id = get_jwt_identity()
-    
-    if not is_admin(user_id):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     event = Event.query.get(event_id)
     
     if not event:
@@ -276,16 +274,13 @@ def delete_event(event_id):
     db.session.delete(event)
     db.session.commit()
     
+    event_changed(event_id)
+    
     return jsonify({'message': 'Event deleted successfully'}), 200
 
 @admin_bp.route('/events/<int:event_id>/items', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_event_items(event_id):
-    user_id = get_jwt_identity()
-    
-    if not is_admin(user_id):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     event = Event.query.get(event_id)
     
     if not event:
@@ -296,13 +291,8 @@ def get_event_items(event_id):
     return jsonify([item.to_dict() for item in items]), 200
 
 @admin_bp.route('/events/<int:event_id>/items', methods=['POST'])
-@jwt_required()
+@admin_required
 def add_event_item(event_id):
-    user_id = get_jwt_identity()
-    
-    if not is_admin(user_id):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     event = Event.query.get(event_id)
     
     if not event:
@@ -328,16 +318,13 @@ def add_event_item(event_id):
     db.session.add(new_item)
     db.session.commit()
     
+    event_changed(event_id)
+    
     return jsonify(new_item.to_dict()), 201
 
 @admin_bp.route('/events/<int:event_id>/items/<int:item_id>', methods=['PUT'])
-@jwt_required()
+@admin_required
 def update_event_item(event_id, item_id):
-    user_id = get_jwt_identity()
-    
-    if not is_admin(user_id):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     item = EventItem.query.filter_by(id=item_id, event_id=event_id).first()
     
     if not item:
@@ -361,16 +348,13 @@ def update_event_item(event_id, item_id):
     
     db.session.commit()
     
+    event_changed(event_id)
+    
     return jsonify(item.to_dict()), 200
 
 @admin_bp.route('/events/<int:event_id>/items/<int:item_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_event_item(event_id, item_id):
-    user_id = get_jwt_identity()
-    
-    if not is_admin(user_id):
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     item = EventItem.query.filter_by(id=item_id, event_id=event_id).first()
     
     if not item:
@@ -379,168 +363,18 @@ def delete_event_item(event_id, item_id):
     db.session.delete(item)
     db.session.commit()
     
+    event_changed(event_id)
+    
     return jsonify({'message': 'Item deleted successfully'}), 200
 
 @admin_bp.route('/analytics', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_analytics():
-    user_id = get_jwt_identity()
+    # Get time range parameter (default to 30 days)
+    days = max(1, min(int(request.args.get('days', 30)), 365))
     
-    if not is_admin(user_id):
-        return jsonify({'error': 'Unauthorized'}), 403
+    payload, age = admin_snapshots.get(('analytics', days), build_analytics_payload, days)
     
-    # Get time range parameter (default to 30 days)
-    days = int(request.args.get('days', 30))
-    start_date = datetime.now() - timedelta(days=days)
-    
-    # Revenue analytics
-    total_revenue = db.session.query(func.sum(Order.total_amount)).filter(
-        Order.status != 'cancelled'
-    ).scalar() or 0
-    
-    # Revenue from the past period for comparison
-    previous_period_start = start_date - timedelta(days=days)
-    previous_revenue = db.session.query(func.sum(Order.total_amount)).filter(
-        Order.status != 'cancelled',
-        Order.created_at >= previous_period_start,
-        Order.created_at < start_date
-    ).scalar() or 0
-    
-    current_revenue = db.session.query(func.sum(Order.total_amount)).filter(
-        Order.status != 'cancelled',
-        Order.created_at >= start_date
-    ).scalar() or 0
-    
-    # Calculate revenue growth
-    revenue_growth = 0
-    if previous_revenue > 0:
-        revenue_growth = ((current_revenue - previous_revenue) / previous_revenue) * 100
-    
-    # Monthly revenue data (last 6 months)
-    monthly_revenue = []
-    for i in range(6):
-        month_start = datetime.now().replace(day=1) - timedelta(days=30 * i)
-        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        
-        month_revenue = db.session.query(func.sum(Order.total_amount)).filter(
-            Order.status != 'cancelled',
-            Order.created_at >= month_start,
-            Order.created_at <= month_end
-        ).scalar() or 0
-        
-        monthly_revenue.insert(0, {
-            'month': month_start.strftime('%b'),
-            'revenue': round(month_revenue, 2)
-        })
-    
-    # User growth analytics
-    total_users = User.query.filter_by(is_admin=False).count()
-    users_current_period = User.query.filter(
-        User.is_admin == False,
-        User.created_at >= start_date
-    ).count()
-    
-    users_previous_period = User.query.filter(
-        User.is_admin == False,
-        User.created_at >= previous_period_start,
-        User.created_at < start_date
-    ).count()
-    
-    # Calculate user growth
-    user_growth_rate = 0
-    if users_previous_period > 0:
-        user_growth_rate = ((users_current_period - users_previous_period) / users_previous_period) * 100
-    
-    # Monthly user growth (last 6 months)
-    user_growth_data = []
-    for i in range(6):
-        month_start = datetime.now().replace(day=1) - timedelta(days=30 * i)
-        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        
-        month_users = User.query.filter(
-            User.is_admin == False,
-            User.created_at >= month_start,
-            User.created_at <= month_end
-        ).count()
-        
-        user_growth_data.insert(0, {
-            'month': month_start.strftime('%b'),
-            'users': month_users
-        })
-    
-    # Order analytics
-    total_orders = Order.query.count()
-    orders_current_period = Order.query.filter(Order.created_at >= start_date).count()
-    orders_previous_period = Order.query.filter(
-        Order.created_at >= previous_period_start,
-        Order.created_at < start_date
-    ).count()
-    
-    # Calculate order growth
-    order_growth_rate = 0
-    if orders_previous_period > 0:
-        order_growth_rate = ((orders_current_period - orders_previous_period) / orders_previous_period) * 100
-    
-    # Order status distribution
-    order_status_data = db.session.query(
-        Order.status, 
-        func.count(Order.id)
-    ).group_by(Order.status).all()
-    
-    order_stats = {}
-    for status, count in order_status_data:
-        order_stats[status] = count
-    
-    # Category performance
-    category_performance = db.session.query(
-        Event.category,
-        func.count(OrderItem.id).label('orders'),
-        func.sum(OrderItem.price * OrderItem.quantity).label('revenue')
-    ).join(OrderItem, Event.id == OrderItem.event_id)\
-     .join(Order, OrderItem.order_id == Order.id)\
-     .filter(Order.status != 'cancelled')\
-     .group_by(Event.category)\
-     .all()
-    
-    category_stats = {}
-    for category, orders, revenue in category_performance:
-        category_stats[category] = {
-            'orders': orders or 0,
-            'revenue': float(revenue or 0)
-        }
-    
-    # Top performing events
-    top_events = db.session.query(
-        Event,
-        func.count(OrderItem.id).label('order_count'),
-        func.sum(OrderItem.price * OrderItem.quantity).label('revenue')
-    ).outerjoin(OrderItem, Event.id == OrderItem.event_id)\
-     .outerjoin(Order, OrderItem.order_id == Order.id)\
-     .filter(db.or_(Order.status != 'cancelled', Order.status.is_(None)))\
-     .group_by(Event.id)\
-     .order_by(func.count(OrderItem.id).desc())\
-     .limit(10).all()
-    
-    top_events_data = []
-    for event, order_count, revenue in top_events:
-        event_dict = event.to_dict()
-        event_dict['order_count'] = order_count or 0
-        event_dict['revenue'] = float(revenue or 0)
-        top_events_data.append(event_dict)
-    
-    return jsonify({
-        'totalRevenue': round(total_revenue, 2),
-        'revenueGrowth': round(revenue_growth, 1),
-        'monthlyRevenue': monthly_revenue,
-        
-        'totalUsers': total_users,
-        'userGrowthRate': round(user_growth_rate, 1),
-        'userGrowth': user_growth_data,
-        
-        'totalOrders': total_orders,
-        'orderGrowthRate': round(order_growth_rate, 1),
-        'orderStats': order_stats,
-        
-        'categoryStats': category_stats,
-        'topEvents': top_events_data
-    }), 200
+    response = jsonify(payload)
+    response.headers['X-Snapshot-Age'] = str(int(age))
+    return response, 200
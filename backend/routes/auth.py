@@ -1,14 +1,22 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
 from werkzeug.security import generate_password_hash
 from models import db, User, PasswordReset, PendingUser
+from services.rollups import rollup_signup
+from services.current_user import load_user, load_profile, invalidate_user
+from services.auth_tokens import issue_access_token, revoke_user_tokens, token_is_revoked
+from services.passwords import password_hasher
+from services.rate_limit import (
+    rate_limiter, LOGIN_LIMIT_PER_IP, LOGIN_LIMIT_PER_EMAIL,
+    PASSWORD_RESET_LIMIT_PER_IP, PASSWORD_RESET_LIMIT_PER_EMAIL
+)
 from datetime import datetime, timedelta
 import uuid
 import re
 import jwt
 import os
 import secrets
-from flask import current_app
 # from services.email_service import email_service  # Removed email service
 
 auth_bp = Blueprint('auth', __name__)
@@ -68,12 +76,13 @@ def register():
         new_user.set_password(data['password'])
         
         db.session.add(new_user)
+        rollup_signup(new_user)
         db.session.commit()
         
         print(f"User {new_user.email} registered successfully")
         
         # Create access token for immediate login
-        access_token = create_access_token(identity=str(new_user.id))
+        access_token = issue_access_token(new_user)
         
         return jsonify({
             'success': True,
@@ -121,6 +130,7 @@ def verify_email():
         # Create actual user from pending user
         user = pending_user.to_user()
         db.session.add(user)
+        rollup_signup(user)
         
         # Remove pending user
         db.session.delete(pending_user)
@@ -130,7 +140,7 @@ def verify_email():
         print(f"User {user.email} verified successfully")
         
         # Create access token
-        access_token = create_access_token(identity=str(user.id))
+        access_token = issue_access_token(user)
         
         return jsonify({
             'success': True,
@@ -191,9 +201,10 @@ def resend_verification():
         }), 500
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limiter.limit('login', per_ip=LOGIN_LIMIT_PER_IP, per_email=LOGIN_LIMIT_PER_EMAIL)
 def login():
     data = request.get_json()
-    print(f"Login attempt with data: {data}")
+    print(f"Login attempt for: {data.get('email')}")
     
     # Validate required fields
     if not data.get('email') or not data.get('password'):
@@ -214,10 +225,15 @@ def login():
         print(f"Password check failed for user: {user.email}")
         return jsonify({'error': 'Invalid email or password'}), 401
     
+    # Upgrade hashes made with an older method or cost while the plaintext is at hand
+    if password_hasher.needs_rehash(user.password_hash):
+        user.set_password(data['password'])
+        db.session.commit()
+    
     # Email verification removed - users can login directly
     
     # Create access token
-    access_token = create_access_token(identity=str(user.id))
+    access_token = issue_access_token(user)
     print(f"Generated access token for user ID: {user.id}")
     
     # Format response to match what frontend expects
@@ -260,6 +276,7 @@ def update_profile():
         user.pincode = data['pincode']
     
     db.session.commit()
+    invalidate_user(user_id)
     
     return jsonify(user.to_dict()), 200
 
@@ -283,13 +300,16 @@ def change_password():
         if not user.check_password(data['current_password']):
             return jsonify({'error': 'Current password is incorrect'}), 400
         
-        # Update password
+        # Update password and sign out every other session
         user.set_password(data['new_password'])
+        revoke_user_tokens(user)
         db.session.commit()
+        invalidate_user(user_id)
         
         return jsonify({
             'success': True,
-            'message': 'Password updated successfully'
+            'message': 'Password updated successfully',
+            'access_token': issue_access_token(user)
         }), 200
         
     except Exception as e:
@@ -300,6 +320,8 @@ def change_password():
         }), 500
 
 @auth_bp.route('/request-password-reset', methods=['POST'])
+@rate_limiter.limit('password_reset', per_ip=PASSWORD_RESET_LIMIT_PER_IP,
+                    per_email=PASSWORD_RESET_LIMIT_PER_EMAIL)
 def request_password_reset():
     data = request.get_json()
     
@@ -368,7 +390,11 @@ def reset_password(token):
     # Mark token as used
     reset.used = True
     
+    # Sign out every existing session
+    revoke_user_tokens(user)
+    
     db.session.commit()
+    invalidate_user(user.id)
     
     return jsonify({'message': 'Password has been reset successfully'}), 200
 
@@ -381,8 +407,10 @@ def delete_account():
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
+    rollup_signup(user, delta=-1)
     db.session.delete(user)
     db.session.commit()
+    invalidate_user(user_id)
     
     return jsonify({'message': 'Account deleted successfully'}), 200
 
@@ -406,8 +434,21 @@ def refresh_token():
             'message': 'User not found'
         }), 404
     
+    # Only renew a token this server issued to the same user. It may have
+    # expired, but a revoked token (older token version) is refused.
+    try:
+        old_token = decode_token(data.get('oldToken') or '', allow_expired=True)
+    except (JWTExtendedException, jwt.InvalidTokenError):
+        old_token = None
+    if (not old_token or old_token.get('sub') != str(user.id)
+            or token_is_revoked(old_token, load_user(user.id))):
+        return jsonify({
+            'success': False,
+            'message': 'A valid token is required to refresh'
+        }), 401
+    
     # Create new access token
-    access_token = create_access_token(identity=str(user.id))
+    access_token = issue_access_token(user)
     
     return jsonify({
         'success': True,
@@ -418,31 +459,15 @@ def refresh_token():
 
 @auth_bp.route('/verify-token', methods=['POST'])
 def verify_token():
-    """Verify if a token is valid"""
-    # Add more debug for troubleshooting
-    print(f"Verify token request received, content type: {request.content_type}")
-    print(f"Request data: {request.data}")
-    
-    # Handle different content types
-    if request.content_type and 'application/json' in request.content_type:
-        data = request.get_json(silent=True)
-        print(f"Parsed JSON data: {data}")
-    else:
-        # Try to parse as form data or raw
-        data = request.form.to_dict() if request.form else None
-        if not data and request.data:
-            # Try to parse raw data as JSON
-            try:
-                import json
-                data = json.loads(request.data)
-                print(f"Parsed raw data as JSON: {data}")
-            except:
-                # Fallback to just getting the data as string
-                data = {'token': request.data.decode('utf-8').strip()}
-                print(f"Using raw data as token: {data}")
-    
-    if not data or 'token' not in data:
-        print("No token found in request")
+    """Verify if a token is valid.
+
+    The frontend calls this on every navigation, so a warm request checks the
+    signature, expiry and revocation against cached data without touching the
+    database. Pass ?minimal=1 to get just the verdict without the user.
+    """
+    data = request.get_json(silent=True)
+    token = data.get('token') if isinstance(data, dict) else None
+    if not token:
         return jsonify({
             'success': False,
             'valid': False,
@@ -450,59 +475,44 @@ def verify_token():
         }), 400
     
     try:
-        # Verify the token
-        token = data['token']
-        print(f"Attempting to verify token: {token[:15]}...")
-        
-        decoded = jwt.decode(
-            token,
-            current_app.config['JWT_SECRET_KEY'],
-            algorithms=['HS256']
-        )
-        
-        print(f"Token decoded successfully, subject: {decoded.get('sub')}")
-        
-        # Check if user exists - convert string subject back to integer for database lookup
-        user_id = int(decoded['sub'])
-        user = User.query.get(user_id)
-        if not user:
-            print(f"User not found for subject: {decoded.get('sub')}")
-            return jsonify({
-                'success': False,
-                'valid': False,
-                'message': 'User not found'
-            }), 404
-        
-        print(f"Token valid for user: {user.email}")
-        return jsonify({
-            'success': True,
-            'valid': True,
-            'message': 'Token is valid',
-            'user': user.to_dict()
-        }), 200
-        
-    except jwt.ExpiredSignatureError as e:
-        print(f"Token expired: {str(e)}")
+        decoded = decode_token(token)
+    except jwt.ExpiredSignatureError:
         return jsonify({
             'success': False,
             'valid': False,
             'message': 'Token has expired'
         }), 401
-        
-    except jwt.InvalidTokenError as e:
-        print(f"Invalid token: {str(e)}")
+    except (jwt.InvalidTokenError, JWTExtendedException):
         return jsonify({
             'success': False,
             'valid': False,
             'message': 'Invalid token'
         }), 401
-    except Exception as e:
-        print(f"Unexpected error verifying token: {str(e)}")
+    
+    user = load_user(decoded.get('sub'))
+    if not user:
         return jsonify({
             'success': False,
             'valid': False,
-            'message': f'Error: {str(e)}'
-        }), 500
+            'message': 'User not found'
+        }), 404
+    
+    if token_is_revoked(decoded, user):
+        return jsonify({
+            'success': False,
+            'valid': False,
+            'message': 'Token has been revoked'
+        }), 401
+    
+    if request.args.get('minimal') in ('1', 'true'):
+        return jsonify({'success': True, 'valid': True}), 200
+    
+    return jsonify({
+        'success': True,
+        'valid': True,
+        'message': 'Token is valid',
+        'user': load_profile(user)
+    }), 200
 
 @auth_bp.route('/logout', methods=['POST'])
 def logout():
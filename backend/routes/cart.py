@@ -1,26 +1,51 @@
+import math
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, Cart, CartItem, Event
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
+from sqlalchemy.exc import IntegrityError
+from models import db, Cart, CartItem, Event
+from services.cart_loader import load_cart, get_or_create_cart
 
 cart_bp = Blueprint('cart', __name__)
 
+# Largest number of operations accepted by a single /batch request
+MAX_BATCH_OPERATIONS = 100
+
+def parse_quantity(value):
+    """A quantity as an int, or None unless it is a whole number (1.5 is not truncated)"""
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def parse_custom_price(value):
+    """A custom line price as a float, or None unless it is a finite, non-negative number"""
+    if isinstance(value, bool):
+        return None
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(price) or price < 0:
+        return None
+    return price
+
 @cart_bp.route('', methods=['GET'])
 @jwt_required()
 def get_cart():
     """Get the current user's cart"""
     user_id = get_jwt_identity()
     
-    # Find user
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
-    
-    # Get or create cart
-    cart = user.cart
+    # Load the cart with its items and events in one go
+    cart = load_cart(user_id)
     if not cart:
-        cart = Cart(user_id=user_id)
-        db.session.add(cart)
-        db.session.commit()
+        # Find user
+        user = current_user
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        cart = get_or_create_cart(user_id)
     
     # Return cart data
     return jsonify(cart.to_dict()), 200
@@ -48,12 +73,12 @@ def add_to_cart():
         return jsonify({'error': 'Event not found'}), 404
     
     # Find user
-    user = User.query.get(user_id)
+    user = current_user
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
     # Get or create cart
-    cart = user.cart
+    cart = Cart.query.filter_by(user_id=user.id).first()
     if not cart:
         cart = Cart(user_id=user_id)
         db.session.add(cart)
@@ -90,7 +115,156 @@ def add_to_cart():
     
     return jsonify({
         'message': 'Item added to cart',
-        'cart': cart.to_dict()
+        'cart': load_cart(user_id).to_dict()
+    }), 200
+
+@cart_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def batch_update_cart():
+    """Apply a list of add/update/remove operations to the cart in one transaction"""
+    import json
+    user_id = get_jwt_identity()
+    data = request.get_json(silent=True)
+    
+    # Validate request data
+    if not data or not isinstance(data.get('operations'), list) or not data['operations']:
+        return jsonify({'error': 'A non-empty list of operations is required'}), 400
+    
+    operations = data['operations']
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({'error': f'At most {MAX_BATCH_OPERATIONS} operations are allowed per batch'}), 400
+    
+    # Get or create cart, with its items and their events loaded
+    cart = load_cart(user_id)
+    if not cart:
+        user = current_user
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        cart = get_or_create_cart(user_id)
+    
+    # Resolve every referenced event with a single IN query
+    try:
+        event_ids = {int(op['event_id']) for op in operations
+                     if isinstance(op, dict) and op.get('event_id') is not None}
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Event IDs must be integers'}), 400
+    
+    events = {}
+    if event_ids:
+        events = {event.id: event for event in Event.query.filter(Event.id.in_(event_ids)).all()}
+    
+    items_by_event = {item.event_id: item for item in cart.items}
+    items_by_id = {item.id: item for item in cart.items}
+    
+    def find_item(op):
+        if op.get('item_id') is not None:
+            return items_by_id.get(int(op['item_id']))
+        if op.get('event_id') is not None:
+            return items_by_event.get(int(op['event_id']))
+        return None
+    
+    def reject(index, message):
+        db.session.rollback()
+        return jsonify({'error': message, 'operation': index}), 400
+    
+    for index, op in enumerate(operations):
+        if not isinstance(op, dict):
+            return reject(index, 'Each operation must be an object')
+        
+        action = op.get('op')
+        try:
+            if action == 'add':
+                if op.get('event_id') is None or op.get('quantity') is None:
+                    return reject(index, 'Event ID and quantity are required')
+                
+                event_id = int(op['event_id'])
+                quantity = parse_quantity(op['quantity'])
+                if quantity is None:
+                    return reject(index, 'Quantity must be a whole number')
+                event = events.get(event_id)
+                if not event:
+                    return reject(index, 'Event not found')
+                if quantity < 1:
+                    return reject(index, 'Quantity must be at least 1')
+                
+                # Use custom price if provided, otherwise use event price
+                custom_price = op.get('custom_price')
+                if custom_price is not None:
+                    custom_price = parse_custom_price(custom_price)
+                    if custom_price is None:
+                        return reject(index, 'Custom price must be a non-negative number')
+                item_price = custom_price if custom_price is not None else event.price
+                customized_items = op.get('customized_items')
+                customized_items_json = json.dumps(customized_items) if customized_items else None
+                
+                cart_item = items_by_event.get(event_id)
+                if cart_item:
+                    # Same semantics as /add: replace the existing line
+                    cart_item.quantity = quantity
+                    cart_item.price = item_price
+                    cart_item.customized_items = customized_items_json
+                else:
+                    cart_item = CartItem(
+                        event_id=event_id,
+                        quantity=quantity,
+                        price=item_price,
+                        customized_items=customized_items_json
+                    )
+                    cart.items.append(cart_item)
+                    items_by_event[event_id] = cart_item
+            
+            elif action == 'update':
+                cart_item = find_item(op)
+                if not cart_item:
+                    return reject(index, 'Item not found in cart')
+                
+                if 'quantity' in op:
+                    quantity = parse_quantity(op['quantity'])
+                    if quantity is None:
+                        return reject(index, 'Quantity must be a whole number')
+                    if quantity < 1:
+                        return reject(index, 'Quantity must be at least 1')
+                    cart_item.quantity = quantity
+                if op.get('custom_price') is not None:
+                    custom_price = parse_custom_price(op['custom_price'])
+                    if custom_price is None:
+                        return reject(index, 'Custom price must be a non-negative number')
+                    cart_item.price = custom_price
+                if 'customized_items' in op:
+                    customized_items = op['customized_items']
+                    cart_item.customized_items = json.dumps(customized_items) if customized_items else None
+            
+            elif action == 'remove':
+                cart_item = find_item(op)
+                if not cart_item:
+                    return reject(index, 'Item not found in cart')
+                
+                cart.items.remove(cart_item)
+                items_by_event.pop(cart_item.event_id, None)
+                items_by_id.pop(cart_item.id, None)
+                # Delete the row now; the unit of work inserts before it deletes,
+                # so re-adding this event later in the batch would otherwise
+                # collide with uq_cart_items_cart_event
+                db.session.flush()
+            
+            else:
+                return reject(index, 'Operation must be one of add, update or remove')
+        
+        except (TypeError, ValueError):
+            return reject(index, 'Invalid operation data')
+        except IntegrityError:
+            return reject(index, 'Conflicting cart operations')
+    
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # e.g. a concurrent request added the same event to this cart
+        db.session.rollback()
+        return jsonify({'error': 'Conflicting cart operations'}), 400
+    
+    return jsonify({
+        'message': f'Applied {len(operations)} cart operations',
+        'cart': load_cart(user_id).to_dict()
     }), 200
 
 @cart_bp.route('/remove/<int:item_id>', methods=['DELETE'])
@@ -99,13 +273,13 @@ def remove_from_cart(item_id):
     """Remove an item from the cart"""
     user_id = get_jwt_identity()
     
-    # Find user and cart
-    user = User.query.get(user_id)
-    if not user or not user.cart:
+    # Find cart
+    cart = Cart.query.filter_by(user_id=user_id).first()
+    if not cart:
         return jsonify({'error': 'Cart not found'}), 404
     
     # Find cart item
-    cart_item = CartItem.query.filter_by(id=item_id, cart_id=user.cart.id).first()
+    cart_item = CartItem.query.filter_by(id=item_id, cart_id=cart.id).first()
     if not cart_item:
         return jsonify({'error': 'Item not found in cart'}), 404
     
@@ -115,7 +289,7 @@ def remove_from_cart(item_id):
     
     return jsonify({
         'message': 'Item removed from cart',
-        'cart': user.cart.to_dict()
+        'cart': load_cart(user_id).to_dict()
     }), 200
 
 @cart_bp.route('/clear', methods=['DELETE'])
@@ -124,13 +298,13 @@ def clear_cart():
     """Clear the cart"""
     user_id = get_jwt_identity()
     
-    # Find user and cart
-    user = User.query.get(user_id)
-    if not user or not user.cart:
+    # Find cart
+    cart = Cart.query.filter_by(user_id=user_id).first()
+    if not cart:
         return jsonify({'error': 'Cart not found'}), 404
     
     # Delete all items
-    CartItem.query.filter_by(cart_id=user.cart.id).delete()
+    CartItem.query.filter_by(cart_id=cart.id).delete()
     db.session.commit()
     
     return jsonify({
@@ -1,8 +1,11 @@
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request, current_user
 from flask_jwt_extended.exceptions import JWTExtendedException
-from models import db, User, Order, Event
+from models import db, Order, UserStats
+from services.user_stats import refresh_user_stats
+from services.catalog import upcoming_events_query
 from sqlalchemy import func, desc
+from sqlalchemy.orm import selectinload
 from datetime import datetime, timedelta
 import jwt
 
@@ -18,30 +21,31 @@ def get_dashboard_stats():
         user_id = get_jwt_identity()
         
         # Get user
-        user = User.query.get(user_id)
+        user = current_user
         if not user:
             return jsonify({
                 'success': False,
                 'message': 'User not found'
             }), 404
     
-        # Get user orders
-        orders = Order.query.filter_by(user_id=user_id).all()
+        # Order totals are maintained on every order write; users without a
+        # stats row yet (e.g. before the backfill) get one computed now
+        stats = UserStats.query.get(user.id)
+        if not stats:
+            stats = refresh_user_stats(user.id)
+            db.session.commit()
         
-        # Calculate total orders
-        total_orders = len(orders)
-        
-        # Calculate pending orders
-        pending_orders = Order.query.filter_by(user_id=user_id, status='pending').count()
-        
-        # Calculate total spent (excluding cancelled orders)
-        total_spent = sum(order.total_amount for order in orders if order.status != 'cancelled')
+        # Load the latest orders with their items once; activity shows 5 and recent orders 4
+        latest_orders = Order.query.options(selectinload(Order.order_items))\
+            .filter_by(user_id=user_id)\
+            .order_by(desc(Order.created_at), desc(Order.id))\
+            .limit(5).all()
         
         # Get recent activity (orders and their status changes)
         recent_activity = []
         
         # Add recent orders to activity
-        for order in Order.query.filter_by(user_id=user_id).order_by(desc(Order.created_at)).limit(5).all():
+        for order in latest_orders:
             action = "Order placed"
             if order.status == 'delivered':
                 action = "Order delivered"
@@ -60,11 +64,9 @@ def get_dashboard_stats():
                 'amount': f"₹{order.total_amount:.2f}"
             })
         
-        # Get upcoming events (events with dates in the future)
-        # In a real app, you would parse the date string and compare with current date
-        # For simplicity, we'll just get the most recent events
+        # Get upcoming events (events dated today or later, soonest first)
         upcoming_events_list = []
-        events = Event.query.order_by(desc(Event.created_at)).limit(3).all()
+        events = upcoming_events_query().limit(3).all()
         for event in events:
             upcoming_events_list.append({
                 'id': event.id,
@@ -76,7 +78,7 @@ def get_dashboard_stats():
         
         # Get recent orders
         recent_orders = []
-        for order in Order.query.filter_by(user_id=user_id).order_by(desc(Order.created_at)).limit(4).all():
+        for order in latest_orders[:4]:
             recent_orders.append({
                 'id': order.order_number,
                 'date': order.created_at.strftime('%d %b, %Y'),
@@ -90,9 +92,9 @@ def get_dashboard_stats():
             'data': {
                 'name': f"{user.first_name} {user.last_name}",
                 'email': user.email,
-                'totalOrders': total_orders,
-                'pendingOrders': pending_orders,
-                'totalSpent': total_spent,
+                'totalOrders': stats.total_orders,
+                'pendingOrders': stats.pending_orders,
+                'totalSpent': stats.total_spent,
                 'upcomingEvents': len(upcoming_events_list),
                 'recentActivity': recent_activity,
                 'upcomingEventsList': upcoming_events_list,
@@ -1,40 +1,123 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Event, EventItem, User
+from flask import Blueprint, request, jsonify, make_response
+from services.auth_tokens import admin_required
+from models import db, Event, EventItem
+from services.event_cache import event_cache
+from services.catalog import event_changed, upcoming_events_query
+from services.event_search import search_event_ids, search_index_ready, MAX_SEARCH_RESULTS
+from services.event_suggest import event_suggestions
+from services.event_facets import event_facets, FACETS
+from sqlalchemy import func
+from datetime import datetime, timedelta
+import hashlib
+import json
 
 events_bp = Blueprint('events', __name__)
 
+def make_etag(*parts):
+    """Build a strong ETag from the version markers of a response"""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+def not_modified(etag):
+    """Return a 304 response when the client already holds the given ETag"""
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return None
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    # Let clients keep the body but always revalidate it
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def event_etag(event_id):
+    """ETag for an event and its items, or None if the event doesn't exist"""
+    marker = db.session.query(
+        Event.updated_at,
+        func.count(EventItem.id),
+        func.max(EventItem.updated_at)
+    ).outerjoin(EventItem, EventItem.event_id == Event.id)\
+     .filter(Event.id == event_id)\
+     .group_by(Event.id, Event.updated_at)\
+     .first()
+    
+    if marker is None:
+        return None
+    return make_etag('event', event_id, *marker)
+
+# Columns returned by the catalog listing, in the same shape as Event.to_dict()
+EVENT_LIST_COLUMNS = (
+    Event.id, Event.title, Event.description, Event.image_url, Event.location,
+    Event.date, Event.starts_at, Event.category, Event.attendees, Event.items,
+    Event.price, Event.delivery_options, Event.created_at
+)
+
+# Upper bound for a single page of the catalog listing
+MAX_EVENTS_PAGE_SIZE = 100
+
+def event_row_to_dict(row):
+    """Build the listing dict for a row selected with EVENT_LIST_COLUMNS"""
+    return {
+        'id': row.id,
+        'title': row.title,
+        'description': row.description,
+        'image_url': row.image_url,
+        'location': row.location,
+        'date': row.date,
+        'starts_at': row.starts_at.isoformat() if row.starts_at else None,
+        'category': row.category,
+        'attendees': row.attendees,
+        'items': row.items,
+        'price': row.price,
+        'delivery_options': row.delivery_options,
+        'created_at': row.created_at.isoformat() if row.created_at else None
+    }
+
 @events_bp.route('', methods=['GET'])
 def get_events():
     try:
-        print("Getting events...")  # Debug log
-        # Get query parameters for filtering
+        # Get query parameters for filtering and keyset pagination
         category = request.args.get('category')
-        print(f"Category filter: {category}")  # Debug log
+        after_id = request.args.get('after_id', type=int)
+        limit = request.args.get('limit', type=int)
         
-        # Base query
-        query = Event.query
+        # Select only the listing columns instead of hydrating Event objects
+        query = db.session.query(*EVENT_LIST_COLUMNS)
+        marker_query = db.session.query(func.count(Event.id), func.max(Event.updated_at))
         
         # Apply category filter if provided
         if category and category != 'all':
-            query = query.filter_by(category=category)
+            query = query.filter(Event.category == category)
+            marker_query = marker_query.filter(Event.category == category)
         
-        # Get all events
-        events = query.all()
-        print(f"Found {len(events)} events")  # Debug log
+        # Any added, removed or edited event changes the count or latest update
+        etag = make_etag('events', request.query_string, *marker_query.one())
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
         
-        # Convert events to dictionaries
-        event_dicts = []
-        for event in events:
-            try:
-                event_dict = event.to_dict()
-                event_dicts.append(event_dict)
-            except Exception as e:
-                print(f"Error converting event {event.id} to dict: {str(e)}")
-                continue
-                
-        print(f"Returning {len(event_dicts)} events")
-        return jsonify(event_dicts), 200
+        if after_id is not None:
+            query = query.filter(Event.id > after_id)
+        
+        query = query.order_by(Event.id)
+        
+        # Without a limit the full catalog is returned, as before
+        if limit is not None:
+            limit = max(1, min(limit, MAX_EVENTS_PAGE_SIZE))
+            # Fetch one extra row to know whether another page exists
+            rows = query.limit(limit + 1).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+        else:
+            rows = query.all()
+            has_more = False
+        
+        response = with_etag(jsonify([event_row_to_dict(row) for row in rows]), etag)
+        if has_more:
+            response.headers['X-Next-After-Id'] = str(rows[-1].id)
+        return response, 200
         
     except Exception as e:
         import traceback
@@ -42,61 +125,224 @@ def get_events():
         print(error_msg)  # Log the full error
         return jsonify({"error": "Internal server error", "details": str(e)}), 500
 
-@events_bp.route('/<int:event_id>', methods=['GET'])
-def get_event(event_id):
+@events_bp.route('/search', methods=['GET'])
+def search_events():
+    q = (request.args.get('q') or '').strip()
+    limit = request.args.get('limit', 20, type=int)
+    
+    if not q:
+        return jsonify({'error': 'Search query is required'}), 400
+    
+    if not search_index_ready():
+        # python app.py creates the table; other deployments run build_search_index.py
+        return jsonify({'error': 'Search is not available yet, the search index has not been built'}), 503
+    
+    try:
+        ranked = search_event_ids(q, min(limit, MAX_SEARCH_RESULTS))
+        if not ranked:
+            return jsonify([]), 200
+        
+        rows = db.session.query(*EVENT_LIST_COLUMNS)\
+            .filter(Event.id.in_([event_id for event_id, _ in ranked]))\
+            .all()
+        rows_by_id = {row.id: row for row in rows}
+        
+        # Keep the ranking order from the search index
+        results = []
+        for event_id, rank in ranked:
+            row = rows_by_id.get(event_id)
+            if row is None:
+                continue
+            result = event_row_to_dict(row)
+            result['rank'] = rank
+            results.append(result)
+        
+        return jsonify(results), 200
+        
+    except Exception as e:
+        import traceback
+        error_msg = f"Error in search_events: {str(e)}\n{traceback.format_exc()}"
+        print(error_msg)  # Log the full error
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
+@events_bp.route('/suggest', methods=['GET'])
+def suggest_events():
+    q = request.args.get('q', '')
+    limit = request.args.get('limit', 10, type=int)
+    
+    try:
+        return jsonify(event_suggestions.suggest(q, limit)), 200
+    except Exception as e:
+        import traceback
+        error_msg = f"Error in suggest_events: {str(e)}\n{traceback.format_exc()}"
+        print(error_msg)  # Log the full error
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
+@events_bp.route('/upcoming', methods=['GET'])
+def get_upcoming_events():
+    limit = request.args.get('limit', 10, type=int)
+    days = request.args.get('days', type=int)
+    category = request.args.get('category')
+    
+    try:
+        until = None
+        if days is not None:
+            until = datetime.utcnow() + timedelta(days=max(1, days))
+        
+        limit = max(1, min(limit, MAX_EVENTS_PAGE_SIZE))
+        rows = upcoming_events_query(*EVENT_LIST_COLUMNS, until=until, category=category)\
+            .limit(limit)\
+            .all()
+        
+        return jsonify([event_row_to_dict(row) for row in rows]), 200
+        
+    except Exception as e:
+        import traceback
+        error_msg = f"Error in get_upcoming_events: {str(e)}\n{traceback.format_exc()}"
+        print(error_msg)  # Log the full error
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
+def parse_facet_filters():
+    """Read facet filters from repeated or comma separated query parameters"""
+    filters = {}
+    for facet in FACETS:
+        keys = set()
+        for value in request.args.getlist(facet):
+            keys.update(part.strip().lower() for part in value.split(',') if part.strip())
+        # Match the listing, where category=all means no filter
+        keys.discard('all')
+        if keys:
+            filters[facet] = keys
+    return filters
+
+@events_bp.route('/browse', methods=['GET'])
+def browse_events():
+    after_id = request.args.get('after_id', type=int)
+    limit = request.args.get('limit', type=int)
+    
     try:
-        event = Event.query.get(event_id)
+        event_ids, facets = event_facets.search(parse_facet_filters())
+        total = len(event_ids)
         
-        if not event:
-            return jsonify({
-                'success': False,
-                'message': 'Event not found'
-            }), 404
+        if after_id is not None:
+            event_ids = [event_id for event_id in event_ids if event_id > after_id]
         
-        # Get event details
-        event_data = event.to_dict()
+        has_more = False
+        if limit is not None:
+            limit = max(1, min(limit, MAX_EVENTS_PAGE_SIZE))
+            has_more = len(event_ids) > limit
+            event_ids = event_ids[:limit]
         
-        # Get all items for this event
-        event_items = EventItem.query.filter_by(event_id=event_id).all()
+        rows = []
+        if event_ids:
+            rows = db.session.query(*EVENT_LIST_COLUMNS)\
+                .filter(Event.id.in_(event_ids))\
+                .order_by(Event.id)\
+                .all()
         
-        # Group items by category
-        categories_dict = {}
-        for item in event_items:
-            category = item.category or 'default'
-            if category not in categories_dict:
-                categories_dict[category] = {
-                    'id': category,
-                    'name': category.replace('_', ' ').title(),
-                    'items': []
-                }
-            categories_dict[category]['items'].append(item.to_dict())
+        response = jsonify({
+            'events': [event_row_to_dict(row) for row in rows],
+            'facets': facets,
+            'total': total
+        })
+        if has_more:
+            response.headers['X-Next-After-Id'] = str(event_ids[-1])
+        return response, 200
         
-        # Convert to list format expected by frontend
-        event_data['categories'] = list(categories_dict.values())
-        event_data['items'] = [item.to_dict() for item in event_items]
+    except Exception as e:
+        import traceback
+        error_msg = f"Error in browse_events: {str(e)}\n{traceback.format_exc()}"
+        print(error_msg)  # Log the full error
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
+# Delivery options used when an event has none stored or they fail to parse
+DEFAULT_DELIVERY_OPTIONS = [
+    {'id': 'delivery', 'name': 'Local Delivery', 'price': 19.99, 'time': '2-3 days'},
+    {'id': 'express', 'name': 'Express Delivery', 'price': 34.99, 'time': '24 hours'},
+    {'id': 'pickup', 'name': 'Self Pickup', 'price': 0, 'time': 'Same day'}
+]
+
+def build_event_detail(event_id):
+    """Assemble the full event detail payload, or None if the event doesn't exist"""
+    event = Event.query.get(event_id)
+    
+    if not event:
+        return None
+    
+    # Get event details
+    event_data = event.to_dict()
+    
+    # Get all items for this event
+    event_items = EventItem.query.filter_by(event_id=event_id).all()
+    item_dicts = [item.to_dict() for item in event_items]
+    
+    # Group items by category
+    categories_dict = {}
+    for item_dict in item_dicts:
+        category = item_dict['category'] or 'default'
+        if category not in categories_dict:
+            categories_dict[category] = {
+                'id': category,
+                'name': category.replace('_', ' ').title(),
+                'items': []
+            }
+        categories_dict[category]['items'].append(item_dict)
+    
+    # Convert to list format expected by frontend
+    event_data['categories'] = list(categories_dict.values())
+    event_data['items'] = item_dicts
+    
+    # Parse delivery options if stored as JSON string
+    if event_data.get('delivery_options'):
+        try:
+            if isinstance(event_data['delivery_options'], str):
+                event_data['delivery_options'] = json.loads(event_data['delivery_options'])
+        except:
+            # Fallback to default delivery options
+            event_data['delivery_options'] = DEFAULT_DELIVERY_OPTIONS
+    else:
+        # Ensure delivery options exist
+        event_data['delivery_options'] = DEFAULT_DELIVERY_OPTIONS
+    
+    return event_data
+
+@events_bp.route('/<int:event_id>', methods=['GET'])
+def get_event(event_id):
+    try:
+        cached = event_cache.get(event_id)
         
-        # Parse delivery options if stored as JSON string
-        if event_data.get('delivery_options'):
-            try:
-                import json
-                if isinstance(event_data['delivery_options'], str):
-                    event_data['delivery_options'] = json.loads(event_data['delivery_options'])
-            except:
-                # Fallback to default delivery options
-                event_data['delivery_options'] = [
-                    {'id': 'delivery', 'name': 'Local Delivery', 'price': 19.99, 'time': '2-3 days'},
-                    {'id': 'express', 'name': 'Express Delivery', 'price': 34.99, 'time': '24 hours'},
-                    {'id': 'pickup', 'name': 'Self Pickup', 'price': 0, 'time': 'Same day'}
-                ]
+        if cached is None:
+            # Read the version before querying so a concurrent admin write
+            # makes the cache reject this payload instead of storing it
+            version = event_cache.version(event_id)
+            etag = event_etag(event_id)
+            
+            if etag is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'Event not found'
+                }), 404
+            
+            response = not_modified(etag)
+            if response is not None:
+                return response
+            
+            event_data = build_event_detail(event_id)
+            
+            if event_data is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'Event not found'
+                }), 404
+            
+            event_cache.set(event_id, (etag, event_data), version)
         else:
-            # Ensure delivery options exist
-            event_data['delivery_options'] = [
-                {'id': 'delivery', 'name': 'Local Delivery', 'price': 19.99, 'time': '2-3 days'},
-                {'id': 'express', 'name': 'Express Delivery', 'price': 34.99, 'time': '24 hours'},
-                {'id': 'pickup', 'name': 'Self Pickup', 'price': 0, 'time': 'Same day'}
-            ]
+            etag, event_data = cached
+            response = not_modified(etag)
+            if response is not None:
+                return response
         
-        return jsonify(event_data), 200
+        return with_etag(jsonify(event_data), etag), 200
         
     except Exception as e:
         import traceback
@@ -109,14 +355,8 @@ def get_event(event_id):
 
 # Admin routes for event management
 @events_bp.route('', methods=['POST'])
-@jwt_required()
+@admin_required
 def create_event():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user or not user.is_admin:
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     data = request.get_json()
     
     # Validate required fields
@@ -155,17 +395,13 @@ def create_event():
         
         db.session.commit()
     
+    event_changed(new_event.id)
+    
     return jsonify(new_event.to_dict()), 201
 
 @events_bp.route('/<int:event_id>', methods=['PUT'])
-@jwt_required()
+@admin_required
 def update_event(event_id):
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user or not user.is_admin:
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     event = Event.query.get(event_id)
     
     if not event:
@@ -213,17 +449,13 @@ def update_event(event_id):
         
         db.session.commit()
     
+    event_changed(event_id)
+    
     return jsonify(event.to_dict()), 200
 
 @events_bp.route('/<int:event_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_event(event_id):
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user or not user.is_admin:
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     event = Event.query.get(event_id)
     
     if not event:
@@ -232,29 +464,29 @@ def delete_event(event_id):
     db.session.delete(event)
     db.session.commit()
     
+    event_changed(event_id)
+    
     return jsonify({'message': 'Event deleted successfully'}), 200
 
 # Event items routes
 @events_bp.route('/<int:event_id>/items', methods=['GET'])
 def get_event_items(event_id):
-    event = Event.query.get(event_id)
+    etag = event_etag(event_id)
     
-    if not event:
+    if etag is None:
         return jsonify({'error': 'Event not found'}), 404
     
+    response = not_modified(etag)
+    if response is not None:
+        return response
+    
     items = EventItem.query.filter_by(event_id=event_id).all()
     
-    return jsonify([item.to_dict() for item in items]), 200
+    return with_etag(jsonify([item.to_dict() for item in items]), etag), 200
 
 @events_bp.route('/<int:event_id>/items', methods=['POST'])
-@jwt_required()
+@admin_required
 def add_event_item(event_id):
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user or not user.is_admin:
-        return jsonify({'error': 'Unauthorized'}), 403
-    
     event = Event.query.get(event_id)
     
     if not event:
@@ -278,4 +510,6 @@ def add_event_item(event_id):
     db.session.add(new_item)
     db.session.commit()
     
+    event_changed(event_id)
+    
     return jsonify(new_item.to_dict()), 201
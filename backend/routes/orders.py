@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Order, OrderItem, User, Event
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
+from models import db, Order, OrderItem, Event
+from services.order_history import get_order_page
+from services.user_stats import record_order_created, record_order_status_change
+from services.rollups import rollup_order_created, rollup_order_status_change
+from services.event_suggest import event_suggestions
 
 orders_bp = Blueprint('orders', __name__)
 
@@ -9,10 +13,20 @@ orders_bp = Blueprint('orders', __name__)
 def get_user_orders():
     user_id = get_jwt_identity()
     
-    # Get all orders for the user
-    orders = Order.query.filter_by(user_id=user_id).order_by(Order.created_at.desc()).all()
+    # Get the user's orders, paginated when limit or cursor is given
+    try:
+        orders, next_cursor = get_order_page(
+            user_id,
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor')
+        )
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
     
-    return jsonify([order.to_dict() for order in orders]), 200
+    response = jsonify([order.to_dict() for order in orders])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
 
 @orders_bp.route('/<int:order_id>', methods=['GET'])
 @jwt_required()
@@ -31,16 +45,16 @@ def get_order(order_id):
 @jwt_required()
 def create_order():
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_user
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
     data = request.get_json()
     
-    # Validate required fields
+    # Validate required fields (total_amount is computed from the resolved prices)
     required_fields = ['items', 'shipping_address', 'shipping_city', 'shipping_state', 
-                      'shipping_pincode', 'payment_method', 'total_amount']
+                      'shipping_pincode', 'payment_method']
     
     for field in required_fields:
         if field not in data or not data[field]:
@@ -50,10 +64,48 @@ def create_order():
     if not isinstance(data['items'], list) or len(data['items']) == 0:
         return jsonify({'error': 'At least one item is required'}), 400
     
+    # Keep only well-formed lines; the total is computed from these, so a bad
+    # quantity rejects the whole order rather than being skipped
+    lines = []
+    for item_data in data['items']:
+        if not isinstance(item_data, dict) or not item_data.get('event_id') or item_data.get('quantity') is None:
+            continue
+        
+        quantity = item_data['quantity']
+        if isinstance(quantity, bool) or (isinstance(quantity, float) and not quantity.is_integer()):
+            return jsonify({'error': 'Quantity must be a whole number'}), 400
+        try:
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Quantity must be a whole number'}), 400
+        if quantity < 1:
+            return jsonify({'error': 'Quantity must be at least 1'}), 400
+        
+        try:
+            lines.append((int(item_data['event_id']), quantity))
+        except (TypeError, ValueError):
+            continue
+    
+    # Resolve every referenced event with a single IN query
+    event_ids = {event_id for event_id, quantity in lines}
+    events = {}
+    if event_ids:
+        events = {
+            event.id: event
+            for event in db.session.query(Event.id, Event.title, Event.price, Event.category).filter(Event.id.in_(event_ids))
+        }
+    
+    # Skip lines whose event no longer exists, as before
+    lines = [(event_id, quantity) for event_id, quantity in lines if event_id in events]
+    if not lines:
+        return jsonify({'error': 'At least one valid item is required'}), 400
+    
+    total_amount = sum(events[event_id].price * quantity for event_id, quantity in lines)
+    
     # Create new order
     new_order = Order(
         user_id=user_id,
-        total_amount=data['total_amount'],
+        total_amount=total_amount,
         shipping_address=data['shipping_address'],
         shipping_city=data['shipping_city'],
         shipping_state=data['shipping_state'],
@@ -64,30 +116,29 @@ def create_order():
     db.session.add(new_order)
     db.session.flush()  # Get the order ID without committing
     
-    # Add order items
-    for item_data in data['items']:
-        # Validate item data
-        if not item_data.get('event_id') or not item_data.get('quantity'):
-            continue
-        
-        # Get event details
-        event = Event.query.get(item_data['event_id'])
-        if not event:
-            continue
-        
-        # Create order item
-        new_item = OrderItem(
-            order_id=new_order.id,
-            event_id=event.id,
-            event_title=event.title,
-            price=event.price,
-            quantity=item_data['quantity']
-        )
-        
-        db.session.add(new_item)
+    # Insert all order items in one executemany
+    db.session.bulk_insert_mappings(OrderItem, [
+        {
+            'order_id': new_order.id,
+            'event_id': event_id,
+            'event_title': events[event_id].title,
+            'price': events[event_id].price,
+            'quantity': quantity
+        }
+        for event_id, quantity in lines
+    ])
+    
+    # Keep the user's dashboard totals and the analytics rollups in the same transaction
+    record_order_created(new_order)
+    rollup_order_created(new_order, [
+        (event_id, events[event_id].category, events[event_id].price * quantity)
+        for event_id, quantity in lines
+    ])
     
     db.session.commit()
     
+    event_suggestions.record_orders(event_id for event_id, _ in lines)
+    
     return jsonify(new_order.to_dict()), 201
 
 @orders_bp.route('/<int:order_id>/cancel', methods=['PUT'])
@@ -106,7 +157,10 @@ def cancel_order(order_id):
         return jsonify({'error': 'Order cannot be cancelled'}), 400
     
     # Update order status
+    old_status = order.status
     order.status = 'cancelled'
+    record_order_status_change(order, old_status)
+    rollup_order_status_change(order, old_status)
     db.session.commit()
     
     return jsonify(order.to_dict()), 200
@@ -1,7 +1,10 @@
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, Order, Address, PaymentMethod, Wishlist, Event
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
+from models import db, User, Address, PaymentMethod, Wishlist, Event
 from sqlalchemy import desc
+from services.order_history import get_order_page
+from services.rollups import rollup_signup
+from services.current_user import invalidate_user
 import requests
 
 users_bp = Blueprint('users', __name__)
@@ -42,6 +45,7 @@ def update_user_profile():
         user.phone = data['phone']
     
     db.session.commit()
+    invalidate_user(user_id)
     
     return jsonify(user.to_dict()), 200
 
@@ -52,12 +56,19 @@ def get_user_orders():
     user_id = get_jwt_identity()
     
     # Find user
-    user = User.query.get(user_id)
+    user = current_user
     if not user:
         return jsonify({'success': False, 'message': 'User not found'}), 404
     
-    # Get user orders
-    orders = Order.query.filter_by(user_id=user_id).order_by(desc(Order.created_at)).all()
+    # Get user orders, paginated when limit or cursor is given
+    try:
+        orders, next_cursor = get_order_page(
+            user_id,
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor')
+        )
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
     
     # Format orders for response
     formatted_orders = []
@@ -81,6 +92,7 @@ def get_user_orders():
     return jsonify({
         'success': True,
         'data': formatted_orders,
+        'next_cursor': next_cursor,
         'message': 'Orders retrieved successfully'
     }), 200
 
@@ -97,8 +109,10 @@ def delete_user_account():
     
     try:
         # Delete user (this will cascade delete related data)
+        rollup_signup(user, delta=-1)
         db.session.delete(user)
         db.session.commit()
+        invalidate_user(user_id)
         
         return jsonify({
             'success': True,
@@ -121,7 +135,7 @@ def get_user_addresses():
     user_id = get_jwt_identity()
     
     # Find user
-    user = User.query.get(user_id)
+    user = current_user
     if not user:
         return jsonify({'success': False, 'message': 'User not found'}), 404
     
@@ -141,7 +155,7 @@ def add_user_address():
     user_id = get_jwt_identity()
     
     # Find user
-    user = User.query.get(user_id)
+    user = current_user
     if not user:
         return jsonify({'success': False, 'message': 'User not found'}), 404
     
@@ -277,7 +291,7 @@ def get_user_payment_methods():
     user_id = get_jwt_identity()
     
     # Find user
-    user = User.query.get(user_id)
+    user = current_user
     if not user:
         return jsonify({'success': False, 'message': 'User not found'}), 404
     
@@ -297,7 +311,7 @@ def add_user_payment_method():
     user_id = get_jwt_identity()
     
     # Find user
-    user = User.query.get(user_id)
+    user = current_user
     if not user:
         return jsonify({'success': False, 'message': 'User not found'}), 404
     
@@ -395,7 +409,7 @@ def get_user_wishlist():
     user_id = get_jwt_identity()
     
     # Find user
-    user = User.query.get(user_id)
+    user = current_user
     if not user:
         return jsonify({'success': False, 'message': 'User not found'}), 404
     
@@ -415,7 +429,7 @@ def add_to_wishlist():
     user_id = get_jwt_identity()
     
     # Find user
-    user = User.query.get(user_id)
+    user = current_user
     if not user:
         return jsonify({'success': False, 'message': 'User not found'}), 404
     
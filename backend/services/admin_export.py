@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+from datetime import datetime, date
+from sqlalchemy import func, case
+from models import db, User, Order
+from services.admin_orders import ORDER_FIELDS, apply_order_filters
+from services.admin_users import search_filter
+
+# Rows fetched per round trip (server-side cursor on PostgreSQL) and per chunk sent
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+USER_EXPORT_FIELDS = ('id', 'email', 'first_name', 'last_name', 'phone', 'terms_agreed', 'created_at')
+
+
+def export_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def stream_rows(query, columns, export_format):
+    """Yield a column query as CSV or NDJSON text, one chunk per batch of rows.
+
+    Rows are fetched with yield_per, so memory use stays flat however many
+    rows the query returns, and the header (for CSV) goes out before the
+    first batch is read.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == 'csv' else None
+    
+    if writer:
+        writer.writerow(columns)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    
+    for count, row in enumerate(query.yield_per(EXPORT_BATCH_SIZE), start=1):
+        values = [export_value(value) for value in row]
+        if writer:
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(dict(zip(columns, values))))
+            buffer.write('\n')
+        
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_orders(export_format, **filters):
+    """Stream every order matching the admin filters, oldest first"""
+    columns = ORDER_FIELDS + ('user_email',)
+    query = db.session.query(
+        *[getattr(Order, field) for field in ORDER_FIELDS],
+        User.email
+    ).join(User, Order.user_id == User.id)
+    query = apply_order_filters(query, **filters).order_by(Order.id)
+    return stream_rows(query, columns, export_format)
+
+
+def export_users(export_format, q=None):
+    """Stream every non-admin user with their order count and spend, oldest first"""
+    totals = db.session.query(
+        Order.user_id.label('user_id'),
+        func.count(Order.id).label('order_count'),
+        func.sum(case((Order.status != 'cancelled', Order.total_amount), else_=0)).label('total_spent')
+    ).group_by(Order.user_id).subquery()
+    
+    columns = USER_EXPORT_FIELDS + ('order_count', 'total_spent')
+    query = db.session.query(
+        *[getattr(User, field) for field in USER_EXPORT_FIELDS],
+        func.coalesce(totals.c.order_count, 0),
+        func.coalesce(totals.c.total_spent, 0)
+    ).outerjoin(totals, totals.c.user_id == User.id)\
+     .filter(User.is_admin == False)
+    
+    if q:
+        query = query.filter(search_filter(q))
+    
+    return stream_rows(query.order_by(User.id), columns, export_format)
@@ -0,0 +1,152 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import or_, and_, func
+from sqlalchemy.orm import selectinload, contains_eager, load_only
+from models import db, Order, User
+
+# Columns an admin listing can ask for with ?fields=, plus the 'items' and 'user' extras
+ORDER_FIELDS = (
+    'id', 'user_id', 'order_number', 'total_amount', 'status', 'shipping_address',
+    'shipping_city', 'shipping_state', 'shipping_pincode', 'payment_method',
+    'payment_status', 'created_at'
+)
+ORDER_EXTRAS = ('items', 'user')
+
+# Sort keys accepted by ?sort=
+ORDER_SORTS = {
+    'created_at': Order.created_at,
+    'total_amount': Order.total_amount
+}
+
+DEFAULT_ADMIN_ORDER_PAGE_SIZE = 50
+MAX_ADMIN_ORDER_PAGE_SIZE = 200
+
+
+def parse_fields(value):
+    """Split a ?fields= value into (order columns, include items, include user).
+
+    Without a value the full Order.to_dict() shape plus the user is returned,
+    matching the unprojected listing. Raises ValueError on unknown fields.
+    """
+    if not value:
+        return ORDER_FIELDS, True, True
+    
+    requested = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in requested if field not in ORDER_FIELDS + ORDER_EXTRAS]
+    if unknown:
+        raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+    
+    columns = tuple(field for field in ORDER_FIELDS if field in requested)
+    return columns, 'items' in requested, 'user' in requested
+
+
+def encode_cursor(sort, value, order_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, order_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, sort):
+    """Return (sort value, order id) for a cursor, raising ValueError if it is
+    malformed or was issued for a different sort"""
+    try:
+        cursor_sort, value, order_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if cursor_sort != sort:
+            raise ValueError('Cursor does not match sort')
+        if sort == 'created_at':
+            value = datetime.fromisoformat(value)
+        return value, int(order_id)
+    except (UnicodeError, TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def apply_order_filters(query, statuses=None, date_from=None, date_to=None, email_prefix=None,
+                        min_total=None, max_total=None):
+    """Apply the admin order filters to a query that already joins users"""
+    if statuses:
+        query = query.filter(Order.status.in_(statuses))
+    if date_from:
+        query = query.filter(Order.created_at >= date_from)
+    if date_to:
+        query = query.filter(Order.created_at < date_to)
+    if email_prefix:
+        query = query.filter(func.lower(User.email).like(escape_like(email_prefix.lower()) + '%', escape='\\'))
+    if min_total is not None:
+        query = query.filter(Order.total_amount >= min_total)
+    if max_total is not None:
+        query = query.filter(Order.total_amount <= max_total)
+    return query
+
+
+def list_orders(statuses=None, date_from=None, date_to=None, email_prefix=None,
+                min_total=None, max_total=None, sort='created_at', descending=True,
+                limit=None, cursor=None, fields=None):
+    """Return (orders as dicts, next_cursor) for the admin order listing.
+
+    Users are joined in the same query and items come from one selectinload
+    query for the whole page, and only when requested. Pagination is keyset
+    on (sort column, id) and applies when limit or cursor is given.
+    """
+    columns, with_items, with_user = parse_fields(fields)
+    sort_column = ORDER_SORTS[sort]
+    
+    # Always load what the cursor needs alongside the requested columns
+    load_columns = {'id', 'created_at', sort} | set(columns)
+    query = db.session.query(Order).join(User, Order.user_id == User.id).options(
+        load_only(*[getattr(Order, column) for column in ORDER_FIELDS if column in load_columns])
+    )
+    
+    if with_user:
+        query = query.options(contains_eager(Order.user).load_only(User.first_name, User.last_name, User.email))
+    if with_items:
+        query = query.options(selectinload(Order.order_items))
+    
+    query = apply_order_filters(query, statuses, date_from, date_to, email_prefix, min_total, max_total)
+    
+    if cursor:
+        value, order_id = decode_cursor(cursor, sort)
+        if descending:
+            query = query.filter(or_(sort_column < value, and_(sort_column == value, Order.id < order_id)))
+        else:
+            query = query.filter(or_(sort_column > value, and_(sort_column == value, Order.id > order_id)))
+    
+    if descending:
+        query = query.order_by(sort_column.desc(), Order.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), Order.id.asc())
+    
+    next_cursor = None
+    if limit is None and not cursor:
+        orders = query.all()
+    else:
+        limit = max(1, min(limit or DEFAULT_ADMIN_ORDER_PAGE_SIZE, MAX_ADMIN_ORDER_PAGE_SIZE))
+        # Fetch one extra row to know whether another page exists
+        orders = query.limit(limit + 1).all()
+        if len(orders) > limit:
+            last = orders[limit - 1]
+            next_cursor = encode_cursor(sort, getattr(last, sort), last.id)
+        orders = orders[:limit]
+    
+    results = []
+    for order in orders:
+        order_dict = {}
+        for column in columns:
+            value = getattr(order, column)
+            order_dict[column] = value.isoformat() if isinstance(value, datetime) else value
+        if with_items:
+            order_dict['items'] = [item.to_dict() for item in order.order_items]
+        if with_user:
+            order_dict['user'] = {
+                'first_name': order.user.first_name,
+                'last_name': order.user.last_name,
+                'email': order.user.email
+            }
+        results.append(order_dict)
+    
+    return results, next_cursor
@@ -0,0 +1,316 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
+from models import (db, User, Event, Order, DailyRevenue, DailyOrderStatus,
+                    DailyCategorySales, DailyEventSales, DailySignups)
+from services.query_utils import month_bucket, last_month_starts, sum_if
+
+
+class SnapshotStore:
+    """Serve precomputed payloads with stale-while-revalidate semantics.
+
+    The first request for a key builds its payload inline. After that,
+    requests always get the latest snapshot immediately; one older than
+    max_age triggers a refresh on a background thread. A worker thread also
+    rebuilds every recently requested key each interval seconds, so admins
+    rarely see a stale snapshot at all.
+    """
+
+    def __init__(self, interval=60, max_age=30, idle_timeout=600):
+        self.interval = interval
+        self.max_age = max_age
+        self.idle_timeout = idle_timeout
+        self.app = None
+        self._snapshots = {}  # key -> (payload, built_at, last_access, builder, args)
+        self._refreshing = set()
+        self._stale = set()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def init_app(self, app):
+        self.app = app
+
+    def get(self, key, builder, *args):
+        """Return (payload, age in seconds) for a key, building it on first use"""
+        now = time.monotonic()
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None:
+                payload, built_at, _, _, _ = snapshot
+                self._snapshots[key] = (payload, built_at, now, builder, args)
+        
+        if snapshot is None:
+            payload = builder(*args)
+            with self._lock:
+                self._snapshots[key] = (payload, time.monotonic(), now, builder, args)
+            self._ensure_worker()
+            return payload, 0.0
+        
+        age = now - built_at
+        if age > self.max_age or key in self._stale:
+            self.refresh_async(key)
+        return payload, age
+
+    def mark_stale(self):
+        """Force the next read of every snapshot to trigger a refresh"""
+        with self._lock:
+            self._stale.update(self._snapshots)
+
+    def refresh_async(self, key):
+        with self._lock:
+            if key in self._refreshing or key not in self._snapshots:
+                return
+            self._refreshing.add(key)
+        threading.Thread(target=self._refresh, args=(key,), daemon=True).start()
+
+    def _refresh(self, key):
+        try:
+            with self._lock:
+                # Writes landing after this point mark the key stale again
+                self._stale.discard(key)
+                snapshot = self._snapshots.get(key)
+            if snapshot is None:
+                return
+            _, _, _, builder, args = snapshot
+            
+            with self.app.app_context():
+                try:
+                    payload = builder(*args)
+                finally:
+                    db.session.remove()
+            
+            with self._lock:
+                current = self._snapshots.get(key)
+                last_access = current[2] if current else time.monotonic()
+                self._snapshots[key] = (payload, time.monotonic(), last_access, builder, args)
+        except Exception as e:
+            print(f"Error refreshing admin snapshot {key}: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _ensure_worker(self):
+        if self.interval <= 0 or self.app is None:
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name='admin-snapshots', daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            now = time.monotonic()
+            with self._lock:
+                # Stop refreshing keys nobody has asked for in a while
+                for key in [key for key, snapshot in self._snapshots.items()
+                            if now - snapshot[2] > self.idle_timeout]:
+                    del self._snapshots[key]
+                    self._stale.discard(key)
+                keys = list(self._snapshots)
+            for key in keys:
+                self.refresh_async(key)
+
+
+admin_snapshots = SnapshotStore(
+    interval=float(os.getenv('ADMIN_SNAPSHOT_INTERVAL', 60)),
+    max_age=float(os.getenv('ADMIN_SNAPSHOT_MAX_AGE', 30))
+)
+
+
+def build_dashboard_payload():
+    """Counts, revenue, recent orders, status distribution and top events for /api/admin/dashboard"""
+    # Get counts for dashboard; order, revenue and user totals come from the daily rollups
+    totalUsers = db.session.query(func.coalesce(func.sum(DailySignups.signups), 0)).scalar()
+    totalEvents = Event.query.count()
+    totalOrders, totalRevenue = db.session.query(
+        func.coalesce(func.sum(DailyRevenue.order_count), 0),
+        func.coalesce(func.sum(DailyRevenue.revenue), 0)
+    ).one()
+    
+    # Get recent orders with user information
+    recent_orders_query = db.session.query(Order, User).join(User, Order.user_id == User.id)\
+        .options(selectinload(Order.order_items))\
+        .order_by(Order.created_at.desc()).limit(5).all()
+    recent_orders = []
+    for order, user in recent_orders_query:
+        order_dict = order.to_dict()
+        order_dict['user'] = {
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'email': user.email
+        }
+        recent_orders.append(order_dict)
+    
+    # Get order status distribution
+    ordersByStatus = {}
+    status_counts = db.session.query(
+        DailyOrderStatus.status,
+        func.sum(DailyOrderStatus.order_count)
+    ).group_by(DailyOrderStatus.status).all()
+    for status, count in status_counts:
+        if count:
+            ordersByStatus[status] = count
+    
+    # Get top events by order count
+    order_count = func.coalesce(func.sum(DailyEventSales.order_count), 0)
+    top_events_query = db.session.query(
+        Event,
+        order_count.label('order_count')
+    ).outerjoin(DailyEventSales, Event.id == DailyEventSales.event_id).group_by(Event.id).order_by(order_count.desc()).limit(10).all()
+    
+    topEvents = []
+    for event, order_count in top_events_query:
+        event_dict = event.to_dict()
+        event_dict['order_count'] = order_count
+        topEvents.append(event_dict)
+    
+    return {
+        'totalUsers': int(totalUsers),
+        'totalEvents': totalEvents,
+        'totalOrders': int(totalOrders),
+        'totalRevenue': float(totalRevenue),
+        'recentOrders': recent_orders,
+        'ordersByStatus': ordersByStatus,
+        'topEvents': topEvents
+    }
+
+
+def build_analytics_payload(days):
+    """Revenue, user and order analytics over the last `days` days for /api/admin/analytics"""
+    now = datetime.utcnow()
+    # Rollups are per day, so periods start at the beginning of their first day
+    start_day = (now - timedelta(days=days)).date()
+    previous_period_start = start_day - timedelta(days=days)
+    
+    # Everything below reads the daily rollups, so cost scales with days, not rows
+    in_current = DailyRevenue.day >= start_day
+    in_previous = (DailyRevenue.day >= previous_period_start) & (DailyRevenue.day < start_day)
+    
+    # Revenue and order counts for all time and both periods in one pass
+    (total_revenue, current_revenue, previous_revenue,
+     total_orders, orders_current_period, orders_previous_period) = db.session.query(
+        func.coalesce(func.sum(DailyRevenue.revenue), 0),
+        sum_if(in_current, DailyRevenue.revenue),
+        sum_if(in_previous, DailyRevenue.revenue),
+        func.coalesce(func.sum(DailyRevenue.order_count), 0),
+        sum_if(in_current, DailyRevenue.order_count),
+        sum_if(in_previous, DailyRevenue.order_count)
+    ).one()
+    
+    # Calculate revenue growth
+    revenue_growth = 0
+    if previous_revenue > 0:
+        revenue_growth = ((current_revenue - previous_revenue) / previous_revenue) * 100
+    
+    # Monthly series cover the last 6 calendar months, one GROUP BY per metric
+    months = last_month_starts(6, now)
+    
+    revenue_month = month_bucket(DailyRevenue.day)
+    revenue_by_month = dict(db.session.query(
+        revenue_month,
+        func.sum(DailyRevenue.revenue)
+    ).filter(DailyRevenue.day >= months[0].date())
+     .group_by(revenue_month).all())
+    
+    monthly_revenue = [{
+        'month': month_start.strftime('%b'),
+        'revenue': round(float(revenue_by_month.get(month_start.strftime('%Y-%m')) or 0), 2)
+    } for month_start in months]
+    
+    # User growth analytics
+    user_in_current = DailySignups.day >= start_day
+    user_in_previous = (DailySignups.day >= previous_period_start) & (DailySignups.day < start_day)
+    
+    total_users, users_current_period, users_previous_period = db.session.query(
+        func.coalesce(func.sum(DailySignups.signups), 0),
+        sum_if(user_in_current, DailySignups.signups),
+        sum_if(user_in_previous, DailySignups.signups)
+    ).one()
+    
+    # Calculate user growth
+    user_growth_rate = 0
+    if users_previous_period > 0:
+        user_growth_rate = ((users_current_period - users_previous_period) / users_previous_period) * 100
+    
+    signup_month = month_bucket(DailySignups.day)
+    users_by_month = dict(db.session.query(
+        signup_month,
+        func.sum(DailySignups.signups)
+    ).filter(DailySignups.day >= months[0].date())
+     .group_by(signup_month).all())
+    
+    user_growth_data = [{
+        'month': month_start.strftime('%b'),
+        'users': int(users_by_month.get(month_start.strftime('%Y-%m')) or 0)
+    } for month_start in months]
+    
+    # Calculate order growth
+    order_growth_rate = 0
+    if orders_previous_period > 0:
+        order_growth_rate = ((orders_current_period - orders_previous_period) / orders_previous_period) * 100
+    
+    # Order status distribution
+    order_status_data = db.session.query(
+        DailyOrderStatus.status,
+        func.sum(DailyOrderStatus.order_count)
+    ).group_by(DailyOrderStatus.status).all()
+    
+    order_stats = {}
+    for status, count in order_status_data:
+        if count:
+            order_stats[status] = count
+    
+    # Category performance
+    category_performance = db.session.query(
+        DailyCategorySales.category,
+        func.sum(DailyCategorySales.order_count).label('orders'),
+        func.sum(DailyCategorySales.revenue).label('revenue')
+    ).group_by(DailyCategorySales.category).all()
+    
+    category_stats = {}
+    for category, orders, revenue in category_performance:
+        if orders:
+            category_stats[category] = {
+                'orders': orders or 0,
+                'revenue': float(revenue or 0)
+            }
+    
+    # Top performing events
+    active_orders = func.coalesce(func.sum(DailyEventSales.active_order_count), 0)
+    top_events = db.session.query(
+        Event,
+        active_orders.label('order_count'),
+        func.sum(DailyEventSales.revenue).label('revenue')
+    ).outerjoin(DailyEventSales, Event.id == DailyEventSales.event_id)\
+     .group_by(Event.id)\
+     .order_by(active_orders.desc())\
+     .limit(10).all()
+    
+    top_events_data = []
+    for event, order_count, revenue in top_events:
+        event_dict = event.to_dict()
+        event_dict['order_count'] = order_count or 0
+        event_dict['revenue'] = float(revenue or 0)
+        top_events_data.append(event_dict)
+    
+    return {
+        'totalRevenue': round(float(total_revenue), 2),
+        'revenueGrowth': round(float(revenue_growth), 1),
+        'monthlyRevenue': monthly_revenue,
+        
+        'totalUsers': int(total_users),
+        'userGrowthRate': round(float(user_growth_rate), 1),
+        'userGrowth': user_growth_data,
+        
+        'totalOrders': int(total_orders),
+        'orderGrowthRate': round(float(order_growth_rate), 1),
+        'orderStats': order_stats,
+        
+        'categoryStats': category_stats,
+        'topEvents': top_events_data
+    }
@@ -0,0 +1,79 @@
+from sqlalchemy import or_, and_, func, case
+from models import db, User, Order
+from services.admin_orders import escape_like
+
+DEFAULT_ADMIN_USER_PAGE_SIZE = 50
+MAX_ADMIN_USER_PAGE_SIZE = 200
+
+
+def prefix_match(column, prefix):
+    """lower(column) LIKE 'prefix%', matching the lower() prefix indexes on users"""
+    return func.lower(column).like(escape_like(prefix.lower()) + '%', escape='\\')
+
+
+def search_filter(q):
+    """Match q as a prefix of email, first name, last name or phone.
+
+    A query with a space, such as 'Priya Sh', also matches first name
+    'Priya...' together with last name 'Sh...'.
+    """
+    conditions = [
+        prefix_match(User.email, q),
+        prefix_match(User.first_name, q),
+        prefix_match(User.last_name, q),
+        User.phone.like(escape_like(q) + '%', escape='\\')
+    ]
+    first, _, rest = q.partition(' ')
+    if rest.strip():
+        conditions.append(and_(prefix_match(User.first_name, first), prefix_match(User.last_name, rest.strip())))
+    return or_(*conditions)
+
+
+def order_totals(user_ids=None):
+    """{user_id: (order_count, total_spent)} from one grouped query over orders"""
+    query = db.session.query(
+        Order.user_id,
+        func.count(Order.id),
+        func.coalesce(func.sum(case((Order.status != 'cancelled', Order.total_amount), else_=0)), 0)
+    )
+    if user_ids is not None:
+        query = query.filter(Order.user_id.in_(user_ids))
+    return {user_id: (count, float(spent)) for user_id, count, spent in query.group_by(Order.user_id)}
+
+
+def list_users(q=None, limit=None, cursor=None):
+    """Return (users as dicts, next_cursor) for the admin user listing, newest first.
+
+    Each user carries order_count and total_spent (excluding cancelled
+    orders). Pagination is keyset on id and applies when limit or cursor is
+    given; the cursor is the id of the last user on the previous page.
+    """
+    query = User.query.filter(User.is_admin == False)
+    
+    if q:
+        query = query.filter(search_filter(q))
+    if cursor:
+        query = query.filter(User.id < int(cursor))
+    
+    query = query.order_by(User.id.desc())
+    
+    next_cursor = None
+    if limit is None and not cursor:
+        users = query.all()
+        totals = order_totals()
+    else:
+        limit = max(1, min(limit or DEFAULT_ADMIN_USER_PAGE_SIZE, MAX_ADMIN_USER_PAGE_SIZE))
+        # Fetch one extra row to know whether another page exists
+        users = query.limit(limit + 1).all()
+        if len(users) > limit:
+            next_cursor = str(users[limit - 1].id)
+        users = users[:limit]
+        totals = order_totals([user.id for user in users]) if users else {}
+    
+    results = []
+    for user in users:
+        user_dict = user.to_dict()
+        user_dict['order_count'], user_dict['total_spent'] = totals.get(user.id, (0, 0.0))
+        results.append(user_dict)
+    
+    return results, next_cursor
@@ -0,0 +1,50 @@
+from functools import wraps
+from flask import jsonify
+from flask_jwt_extended import create_access_token, verify_jwt_in_request, get_jwt, current_user
+
+
+def token_claims(user):
+    """Claims embedded in every access token so authorization can skip the users table"""
+    return {
+        'is_admin': bool(user.is_admin),
+        'ver': user.token_version or 0
+    }
+
+
+def issue_access_token(user):
+    return create_access_token(identity=str(user.id), additional_claims=token_claims(user))
+
+
+def revoke_user_tokens(user):
+    """Invalidate every token issued to a user so far.
+
+    Bumps the user's token version; tokens carrying an older version are
+    rejected by the blocklist check in app.py. The caller commits, then drops
+    the cached user so this process sees the new version immediately.
+    """
+    user.token_version = (user.token_version or 0) + 1
+
+
+def token_is_revoked(jwt_payload, user):
+    """True when the token's version no longer matches the user's, or the user is gone"""
+    if user is None:
+        return True
+    return jwt_payload.get('ver', 0) != user.token_version
+
+
+def admin_required(fn):
+    """Require a valid access token whose claims mark the user as an admin"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        verify_jwt_in_request()
+
+        is_admin = get_jwt().get('is_admin')
+        if is_admin is None:
+            # Tokens issued before role claims were added fall back to the
+            # cached user loaded for this request
+            is_admin = current_user is not None and current_user.is_admin
+
+        if not is_admin:
+            return jsonify({'error': 'Unauthorized'}), 403
+        return fn(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,26 @@
+from sqlalchemy.orm import selectinload
+from models import db, Cart, CartItem
+
+
+def load_cart(user_id):
+    """Load a user's cart with its items and their events in two queries.
+
+    The first SELECT fetches the cart; selectinload then fetches all of its
+    items in a second SELECT with their events joined on, so Cart.to_dict()
+    never lazy loads no matter how many items the cart holds. Returns None
+    if the user has no cart.
+    """
+    return Cart.query.options(
+        selectinload(Cart.items).joinedload(CartItem.event)
+    ).filter_by(user_id=user_id).first()
+
+
+def get_or_create_cart(user_id):
+    """Return the eager-loaded cart for a user, creating an empty one if needed"""
+    cart = load_cart(user_id)
+    if not cart:
+        cart = Cart(user_id=user_id)
+        db.session.add(cart)
+        db.session.commit()
+        cart = load_cart(user_id)
+    return cart
@@ -0,0 +1,34 @@
+from datetime import datetime
+from models import db, Event
+from services.event_cache import event_cache
+from services.event_search import reindex_event
+from services.event_suggest import event_suggestions
+
+
+def event_changed(event_id):
+    """Refresh everything derived from an event after a committed write.
+
+    Called by the admin and events routes whenever an event or one of its
+    items is created, updated or deleted.
+    """
+    event_cache.bump(event_id)
+    reindex_event(event_id)
+    event_suggestions.update_event(event_id)
+
+
+def upcoming_events_query(*columns, now=None, until=None, category=None):
+    """Events starting today or later, soonest first.
+
+    Filters and orders on the indexed starts_at column, so events whose date
+    couldn't be parsed (e.g. "Customizable") are never included.
+    """
+    now = now or datetime.utcnow()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    query = db.session.query(*columns) if columns else Event.query
+    query = query.filter(Event.starts_at >= today)
+    if until is not None:
+        query = query.filter(Event.starts_at < until)
+    if category and category != 'all':
+        query = query.filter(Event.category == category)
+    return query.order_by(Event.starts_at, Event.id)
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from models import db, User
+
+
+class CachedUser(namedtuple('CachedUser', 'id email first_name last_name is_admin token_version updated_at')):
+    """The slice of a user most authenticated routes need"""
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return f"{self.first_name} {self.last_name}"
+
+    @property
+    def profile_version(self):
+        """Changes whenever the user row is updated, so it can key derived caches"""
+        return self.updated_at.isoformat() if self.updated_at else None
+
+
+class UserCache:
+    """Short-TTL in-process cache of CachedUser rows keyed by user id.
+
+    It backs the JWT user_lookup_loader and the token-version revocation
+    check, so authenticated requests don't reload the user from the database
+    each time. Routes that change a cached field or delete a user call
+    invalidate() after committing. Changes made by other processes (e.g.
+    create_admin.py promoting a user) show up once the entry's TTL runs out.
+    """
+
+    def __init__(self, max_size=10000, ttl=30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user_id -> (stored_at, CachedUser)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or now - entry[0] > self.ttl:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, user_id, user):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(int(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+user_cache = UserCache(
+    max_size=int(os.getenv('USER_CACHE_SIZE', 10000)),
+    ttl=float(os.getenv('USER_CACHE_TTL', 30))
+)
+
+
+def load_user(user_id):
+    """Return the CachedUser for an id (the JWT identity), or None if there's no such user"""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+
+    row = db.session.query(
+        User.id, User.email, User.first_name, User.last_name, User.is_admin, User.token_version,
+        User.updated_at
+    ).filter(User.id == user_id).first()
+    if row is None:
+        return None
+
+    user = CachedUser(row.id, row.email, row.first_name, row.last_name,
+                      bool(row.is_admin), row.token_version or 0, row.updated_at)
+    user_cache.set(user_id, user)
+    return user
+
+
+def invalidate_user(user_id):
+    """Drop a user's cached row after a committed change to it"""
+    user_cache.invalidate(user_id)
+
+
+profile_cache = UserCache(
+    max_size=int(os.getenv('USER_CACHE_SIZE', 10000)),
+    ttl=float(os.getenv('PROFILE_CACHE_TTL', 300))
+)
+
+
+def load_profile(user):
+    """Return User.to_dict() for a CachedUser, cached by (user id, profile version).
+
+    The version comes from the user's updated_at, so once a change has
+    refreshed the cached user the old profile is never served again and
+    simply ages out of the LRU.
+    """
+    key = (user.id, user.profile_version)
+    profile = profile_cache.get(key)
+    if profile is not None:
+        return profile
+
+    row = db.session.get(User, user.id)
+    if row is None:
+        return None
+
+    profile = row.to_dict()
+    profile_cache.set(key, profile)
+    return profile
@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class EventDetailCache:
+    """In-process LRU cache for assembled event detail payloads.
+
+    Entries are stored with the event's version number at the time they were
+    built. Admin write paths call bump() so that the next read sees a version
+    mismatch and rebuilds the payload, even before the TTL runs out.
+    """
+
+    def __init__(self, max_size=1024, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # event_id -> (version, stored_at, payload)
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, event_id):
+        with self._lock:
+            return self._versions.get(event_id, 0)
+
+    def get(self, event_id):
+        """Return the cached payload for an event, or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(event_id)
+            if entry is not None:
+                version, stored_at, payload = entry
+                if version == self._versions.get(event_id, 0) and now - stored_at < self.ttl:
+                    self._entries.move_to_end(event_id)
+                    self.hits += 1
+                    return payload
+                del self._entries[event_id]
+            self.misses += 1
+            return None
+
+    def set(self, event_id, payload, version):
+        """Store a payload built while the event was at the given version"""
+        with self._lock:
+            # Skip payloads that were built before a concurrent write landed
+            if version != self._versions.get(event_id, 0):
+                return
+            self._entries[event_id] = (version, time.monotonic(), payload)
+            self._entries.move_to_end(event_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def bump(self, event_id):
+        """Invalidate an event after it or one of its items has changed"""
+        with self._lock:
+            self._versions[event_id] = self._versions.get(event_id, 0) + 1
+            self._entries.pop(event_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+event_cache = EventDetailCache(
+    max_size=int(os.getenv('EVENT_CACHE_SIZE', 1024)),
+    ttl=float(os.getenv('EVENT_CACHE_TTL', 300))
+)
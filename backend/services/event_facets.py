@@ -0,0 +1,181 @@
+import re
+import threading
+from sqlalchemy import func, select
+from models import db, Event, EventItem
+
+# (key, label, lower bound inclusive, upper bound exclusive)
+PRICE_BUCKETS = (
+    ('under-100', 'Under 100', None, 100),
+    ('100-250', '100 - 250', 100, 250),
+    ('250-500', '250 - 500', 250, 500),
+    ('500-1000', '500 - 1000', 500, 1000),
+    ('1000-plus', '1000+', 1000, None),
+)
+
+# (key, label, lower bound inclusive, upper bound inclusive) on guest count
+ATTENDEE_BANDS = (
+    ('up-to-25', 'Up to 25 guests', None, 25),
+    ('26-50', '26 - 50 guests', 26, 50),
+    ('51-100', '51 - 100 guests', 51, 100),
+    ('101-300', '101 - 300 guests', 101, 300),
+    ('300-plus', '300+ guests', 301, None),
+)
+
+# (key, label, lower bound inclusive, upper bound inclusive) on item count
+ITEM_COUNT_BANDS = (
+    ('none', 'No items', None, 0),
+    ('1-10', '1 - 10 items', 1, 10),
+    ('11-25', '11 - 25 items', 11, 25),
+    ('26-50', '26 - 50 items', 26, 50),
+    ('50-plus', '50+ items', 51, None),
+)
+
+UNSPECIFIED = 'unspecified'
+
+FACETS = ('category', 'location', 'price', 'attendees', 'item_count')
+
+NUMBER_RE = re.compile(r'\d+')
+
+
+def parse_attendees(value):
+    """Guest count for an attendees string like "30-50", "300+" or "about 40".
+
+    Ranges use their upper end and "N+" counts as more than N. Returns None
+    when there's no number to go on.
+    """
+    numbers = [int(n) for n in NUMBER_RE.findall(value or '')]
+    if not numbers:
+        return None
+    if '+' in value:
+        return max(numbers) + 1
+    return max(numbers)
+
+
+def band_for(value, bands, upper_inclusive=True):
+    if value is None:
+        return UNSPECIFIED
+    for key, _, low, high in bands:
+        if low is not None and value < low:
+            continue
+        if high is not None and (value > high if upper_inclusive else value >= high):
+            continue
+        return key
+    return UNSPECIFIED
+
+
+class FacetIndex:
+    """Cached facet values for every event in the catalog.
+
+    The catalog is small, so each event is reduced to its facet keys, held in
+    memory, and filters and counts are evaluated there. The cache is
+    keyed by a marker over events and items (counts and latest updates), which
+    is one cheap aggregate query per request and keeps every worker process
+    consistent with the database.
+    """
+
+    def __init__(self):
+        self._marker = None
+        self._entries = []  # (event_id, {facet: key}) sorted by event id
+        self._labels = {}   # (facet, key) -> label for free-form facets
+        self._lock = threading.Lock()
+
+    def _current_marker(self):
+        row = db.session.execute(select(
+            select(func.count(Event.id)).scalar_subquery(),
+            select(func.max(Event.updated_at)).scalar_subquery(),
+            select(func.count(EventItem.id)).scalar_subquery(),
+            select(func.max(EventItem.updated_at)).scalar_subquery()
+        )).one()
+        return tuple(row)
+
+    def _build(self):
+        item_counts = dict(
+            db.session.query(EventItem.event_id, func.count(EventItem.id))
+            .group_by(EventItem.event_id)
+            .all()
+        )
+        rows = db.session.query(
+            Event.id, Event.category, Event.location, Event.price, Event.attendees
+        ).order_by(Event.id).all()
+
+        entries = []
+        labels = {}
+        for row in rows:
+            category = (row.category or '').strip().lower() or UNSPECIFIED
+            location = (row.location or '').strip().lower() or UNSPECIFIED
+            labels.setdefault(('category', category), (row.category or '').strip() or 'Unspecified')
+            labels.setdefault(('location', location), (row.location or '').strip() or 'Unspecified')
+            entries.append((row.id, {
+                'category': category,
+                'location': location,
+                'price': band_for(row.price, PRICE_BUCKETS, upper_inclusive=False),
+                'attendees': band_for(parse_attendees(row.attendees), ATTENDEE_BANDS),
+                'item_count': band_for(item_counts.get(row.id, 0), ITEM_COUNT_BANDS),
+            }))
+        return entries, labels
+
+    def _load(self):
+        marker = self._current_marker()
+        with self._lock:
+            if marker == self._marker:
+                return self._entries, self._labels
+        entries, labels = self._build()
+        with self._lock:
+            self._marker, self._entries, self._labels = marker, entries, labels
+        return entries, labels
+
+    def search(self, filters):
+        """Apply facet filters and count facet values.
+
+        filters maps a facet name to a set of accepted keys. Returns the
+        matching event ids in id order and, for each facet, counts computed
+        with every filter except that facet's own, so a sidebar can show what
+        selecting another value would add.
+        """
+        entries, labels = self._load()
+        filters = {facet: keys for facet, keys in filters.items() if keys}
+
+        matched = []
+        counts = {facet: {} for facet in FACETS}
+        for event_id, values in entries:
+            failed = [facet for facet, keys in filters.items() if values[facet] not in keys]
+            if not failed:
+                matched.append(event_id)
+            if len(failed) > 1:
+                continue
+            for facet in FACETS:
+                # An event failing only this facet's filter still counts for it
+                if failed and failed[0] != facet:
+                    continue
+                counts[facet][values[facet]] = counts[facet].get(values[facet], 0) + 1
+
+        return matched, self._facet_payload(counts, labels, filters)
+
+    def _facet_payload(self, counts, labels, filters):
+        facets = {}
+        for facet in FACETS:
+            selected = filters.get(facet, ())
+            if facet in ('category', 'location'):
+                keys = sorted(counts[facet], key=lambda key: (-counts[facet][key], key))
+                names = {key: labels.get((facet, key), key) for key in keys}
+            else:
+                bands = {'price': PRICE_BUCKETS, 'attendees': ATTENDEE_BANDS,
+                         'item_count': ITEM_COUNT_BANDS}[facet]
+                keys = [key for key, _, _, _ in bands]
+                names = {key: label for key, label, _, _ in bands}
+                if counts[facet].get(UNSPECIFIED):
+                    keys.append(UNSPECIFIED)
+                    names[UNSPECIFIED] = 'Not specified'
+            facets[facet] = [
+                {
+                    'value': key,
+                    'label': names[key],
+                    'count': counts[facet].get(key, 0),
+                    'selected': key in selected
+                }
+                for key in keys
+            ]
+        return facets
+
+
+event_facets = FacetIndex()
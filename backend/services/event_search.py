@@ -0,0 +1,211 @@
+import re
+import time
+
+from sqlalchemy import text
+from models import db, Event
+
+# Hard cap on results returned for one search query
+MAX_SEARCH_RESULTS = 50
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# How often a missing search table is looked for again, so running
+# build_search_index.py takes effect without restarting the app
+INDEX_RECHECK_INTERVAL = 60
+
+# PostgreSQL keeps one weighted tsvector per event in a side table so the
+# document can include the event's items as well as its own columns.
+PG_CREATE_STATEMENTS = (
+    """
+    CREATE TABLE IF NOT EXISTS event_search (
+        event_id INTEGER PRIMARY KEY REFERENCES events(id) ON DELETE CASCADE,
+        document TSVECTOR NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_event_search_document ON event_search USING GIN (document)",
+)
+
+PG_INDEX_SELECT = """
+    SELECT e.id,
+           setweight(to_tsvector('english', coalesce(e.title, '')), 'A') ||
+           setweight(to_tsvector('english', coalesce(e.category, '') || ' ' || coalesce(e.location, '')), 'B') ||
+           setweight(to_tsvector('english', coalesce(e.description, '')), 'C') ||
+           setweight(to_tsvector('english', coalesce((
+               SELECT string_agg(coalesce(i.name, '') || ' ' || coalesce(i.description, ''), ' ')
+               FROM event_items i WHERE i.event_id = e.id
+           ), '')), 'D')
+    FROM events e
+"""
+
+PG_SEARCH = """
+    SELECT s.event_id, ts_rank_cd(s.document, q) AS rank
+    FROM event_search s, websearch_to_tsquery('english', :q) q
+    WHERE s.document @@ q
+    ORDER BY rank DESC, s.event_id DESC
+    LIMIT :limit
+"""
+
+# SQLite uses an FTS5 table keyed by rowid = event id, one column per field
+# so bm25() can weight title matches above item matches.
+SQLITE_CREATE_STATEMENTS = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS event_search USING fts5(
+        title, category, location, description, items,
+        tokenize = 'porter unicode61'
+    )
+    """,
+)
+
+SQLITE_INDEX_SELECT = """
+    SELECT e.id, coalesce(e.title, ''), coalesce(e.category, ''), coalesce(e.location, ''),
+           coalesce(e.description, ''),
+           coalesce((
+               SELECT group_concat(coalesce(i.name, '') || ' ' || coalesce(i.description, ''), ' ')
+               FROM event_items i WHERE i.event_id = e.id
+           ), '')
+    FROM events e
+"""
+
+SQLITE_SEARCH = """
+    SELECT rowid AS event_id, -bm25(event_search, 10.0, 4.0, 4.0, 2.0, 1.0) AS rank
+    FROM event_search
+    WHERE event_search MATCH :q
+    ORDER BY rank DESC, rowid DESC
+    LIMIT :limit
+"""
+
+
+def dialect():
+    return db.engine.dialect.name
+
+
+def search_index_exists():
+    return db.inspect(db.engine).has_table('event_search')
+
+
+_index_state = {'ready': False, 'checked_at': None}
+
+
+def search_index_ready():
+    """Whether search can be served, without inspecting the schema on every call.
+    
+    Only the PostgreSQL and SQLite paths need the event_search table; once it
+    has been seen it is assumed to stay, and a missing one is re-checked
+    every INDEX_RECHECK_INTERVAL seconds.
+    """
+    if dialect() not in ('postgresql', 'sqlite'):
+        return True
+    if _index_state['ready']:
+        return True
+    
+    now = time.monotonic()
+    checked_at = _index_state['checked_at']
+    if checked_at is None or now - checked_at > INDEX_RECHECK_INTERVAL:
+        _index_state['ready'] = search_index_exists()
+        _index_state['checked_at'] = now
+    return _index_state['ready']
+
+
+def create_search_index():
+    """Create the dialect's search table if it is missing.
+    
+    Returns True when the table was created and still needs a full rebuild.
+    """
+    if dialect() not in ('postgresql', 'sqlite'):
+        return False
+    if search_index_exists():
+        return False
+    
+    statements = PG_CREATE_STATEMENTS if dialect() == 'postgresql' else SQLITE_CREATE_STATEMENTS
+    for statement in statements:
+        db.session.execute(text(statement))
+    db.session.commit()
+    _index_state['ready'] = True
+    return True
+
+
+def _write_documents(event_id=None):
+    """Replace the indexed document of one event, or of every event"""
+    where = '' if event_id is None else ' WHERE e.id = :event_id'
+    params = {} if event_id is None else {'event_id': event_id}
+    
+    if dialect() == 'postgresql':
+        delete = 'DELETE FROM event_search' + ('' if event_id is None else ' WHERE event_id = :event_id')
+        insert = 'INSERT INTO event_search (event_id, document) ' + PG_INDEX_SELECT + where
+    else:
+        delete = 'DELETE FROM event_search' + ('' if event_id is None else ' WHERE rowid = :event_id')
+        insert = ('INSERT INTO event_search (rowid, title, category, location, description, items) '
+                  + SQLITE_INDEX_SELECT + where)
+    
+    db.session.execute(text(delete), params)
+    # For a deleted event the select matches nothing and the entry stays gone
+    db.session.execute(text(insert), params)
+
+
+def reindex_event(event_id):
+    """Refresh the search document for an event after it or its items changed.
+    
+    Runs after the write has been committed. A failure here only leaves the
+    search results stale, so it is logged instead of failing the request.
+    Until the search table has been built there is nothing to refresh, and
+    build_search_index.py indexes every event when it does run.
+    """
+    if dialect() not in ('postgresql', 'sqlite') or not search_index_ready():
+        return
+    try:
+        _write_documents(event_id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error updating search index for event {event_id}: {str(e)}")
+
+
+def rebuild_search_index():
+    """Create the search table if needed and re-index every event"""
+    create_search_index()
+    if dialect() not in ('postgresql', 'sqlite'):
+        return 0
+    _write_documents()
+    db.session.commit()
+    return db.session.execute(text('SELECT count(*) FROM event_search')).scalar()
+
+
+def fts5_query(q):
+    """Turn free text into an FTS5 expression of quoted terms.
+    
+    Quoting keeps user input from being parsed as FTS5 syntax, and the last
+    term is matched as a prefix so results show up while the user is typing.
+    """
+    tokens = TOKEN_RE.findall(q)
+    if not tokens:
+        return None
+    terms = ['"%s"' % token for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_event_ids(q, limit=20):
+    """Return [(event_id, rank)] for a query, best match first"""
+    limit = max(1, min(limit, MAX_SEARCH_RESULTS))
+    
+    if dialect() == 'postgresql':
+        rows = db.session.execute(text(PG_SEARCH), {'q': q, 'limit': limit})
+        return [(row.event_id, float(row.rank)) for row in rows]
+    
+    if dialect() == 'sqlite':
+        match = fts5_query(q)
+        if match is None:
+            return []
+        rows = db.session.execute(text(SQLITE_SEARCH), {'q': match, 'limit': limit})
+        return [(row.event_id, float(row.rank)) for row in rows]
+    
+    # Other databases have no full-text support wired up; fall back to an
+    # unranked substring match on the event's own columns.
+    pattern = f"%{q}%"
+    events = db.session.query(Event.id).filter(db.or_(
+        Event.title.ilike(pattern),
+        Event.description.ilike(pattern),
+        Event.location.ilike(pattern),
+        Event.category.ilike(pattern)
+    )).order_by(Event.id.desc()).limit(limit).all()
+    return [(row.id, 0.0) for row in events]
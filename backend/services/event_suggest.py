@@ -0,0 +1,220 @@
+import bisect
+import os
+import re
+import threading
+import time
+from sqlalchemy import func
+from models import db, Event, EventItem, OrderItem
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Upper bound for the number of suggestions returned per request
+MAX_SUGGESTIONS = 20
+
+
+def tokenize(value):
+    return TOKEN_RE.findall((value or '').lower())
+
+
+class SuggestIndex:
+    """In-process prefix index for catalog typeahead.
+
+    Every event title, category, location and item name becomes a suggestion
+    keyed by (type, label). Suggestions are posted under each of their
+    lowercase tokens, and the tokens are kept in a sorted list so a prefix
+    lookup is a bisect over that list rather than a database query.
+
+    Suggestions remember which events they came from, so an event write only
+    touches that event's entries (update_event), and popularity is the number
+    of order lines for those events. A full rebuild runs every rebuild_interval
+    seconds so processes that didn't see a write still converge.
+    """
+
+    def __init__(self, rebuild_interval=600):
+        self.rebuild_interval = rebuild_interval
+        self.app = None
+        self._postings = {}       # token -> set of suggestion keys
+        self._tokens = []         # sorted tokens in _postings
+        self._suggestions = {}    # key -> {'label': str, 'events': set}
+        self._event_keys = {}     # event_id -> set of suggestion keys
+        self._popularity = {}     # event_id -> order line count
+        self._built_at = None
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+
+    def init_app(self, app):
+        """Remember the app; the index itself is built by the first suggest()"""
+        self.app = app
+
+    def warm(self):
+        """Build the index in the background so the first keystroke is fast.
+
+        Only the serving entry point calls this, once the tables exist; scripts
+        that merely import the app never touch the index.
+        """
+        threading.Thread(target=self._warm, daemon=True).start()
+
+    def _warm(self):
+        with self.app.app_context():
+            try:
+                self.rebuild()
+            except Exception as e:
+                print(f"Error building suggestion index: {str(e)}")
+            finally:
+                db.session.remove()
+
+    # Index maintenance
+
+    def _add(self, event_id, kind, label):
+        label = (label or '').strip()
+        tokens = tokenize(label)
+        if not tokens:
+            return
+        # Events are distinct even when titles repeat; everything else is
+        # merged by its normalized label
+        key = (kind, event_id if kind == 'event' else ' '.join(tokens))
+        suggestion = self._suggestions.get(key)
+        if suggestion is None:
+            suggestion = self._suggestions[key] = {'label': label, 'events': set()}
+            for token in set(tokens):
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = set()
+                    bisect.insort(self._tokens, token)
+                postings.add(key)
+        suggestion['events'].add(event_id)
+        self._event_keys.setdefault(event_id, set()).add(key)
+
+    def _remove_event(self, event_id):
+        for key in self._event_keys.pop(event_id, ()):
+            suggestion = self._suggestions.get(key)
+            if suggestion is None:
+                continue
+            suggestion['events'].discard(event_id)
+            if suggestion['events']:
+                continue
+            del self._suggestions[key]
+            for token in set(tokenize(suggestion['label'])):
+                postings = self._postings.get(token)
+                if postings is None:
+                    continue
+                postings.discard(key)
+                if not postings:
+                    del self._postings[token]
+                    del self._tokens[bisect.bisect_left(self._tokens, token)]
+
+    def _add_event(self, event, item_names):
+        self._add(event.id, 'event', event.title)
+        self._add(event.id, 'category', event.category)
+        self._add(event.id, 'location', event.location)
+        for name in item_names:
+            self._add(event.id, 'item', name)
+
+    def rebuild(self):
+        """Rebuild the whole index from the Event, EventItem and OrderItem tables"""
+        with self._build_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        events = db.session.query(Event.id, Event.title, Event.category, Event.location).all()
+        item_names = {}
+        for event_id, name in db.session.query(EventItem.event_id, EventItem.name):
+            item_names.setdefault(event_id, []).append(name)
+        popularity = dict(
+            db.session.query(OrderItem.event_id, func.count(OrderItem.id))
+            .group_by(OrderItem.event_id)
+            .all()
+        )
+
+        with self._lock:
+            self._postings = {}
+            self._tokens = []
+            self._suggestions = {}
+            self._event_keys = {}
+            for event in events:
+                self._add_event(event, item_names.get(event.id, ()))
+            self._popularity = popularity
+            self._built_at = time.monotonic()
+
+    def update_event(self, event_id):
+        """Re-read one event and its items after a write, or drop it if deleted"""
+        if self._built_at is None:
+            return
+        event = db.session.query(Event.id, Event.title, Event.category, Event.location)\
+            .filter(Event.id == event_id)\
+            .first()
+        item_names = [name for (name,) in db.session.query(EventItem.name).filter_by(event_id=event_id)]
+
+        with self._lock:
+            self._remove_event(event_id)
+            if event is None:
+                self._popularity.pop(event_id, None)
+            else:
+                self._add_event(event, item_names)
+
+    def record_orders(self, event_ids):
+        """Count newly placed order lines towards their events' popularity"""
+        with self._lock:
+            for event_id in event_ids:
+                self._popularity[event_id] = self._popularity.get(event_id, 0) + 1
+
+    # Lookup
+
+    def _ensure_built(self):
+        if self._built_at is None:
+            with self._build_lock:
+                if self._built_at is None:
+                    self._rebuild()
+        elif time.monotonic() - self._built_at > self.rebuild_interval:
+            # Only one request rebuilds; the others keep using the old index
+            if self._build_lock.acquire(blocking=False):
+                try:
+                    self._rebuild()
+                finally:
+                    self._build_lock.release()
+
+    def _prefix_keys(self, prefix):
+        keys = set()
+        index = bisect.bisect_left(self._tokens, prefix)
+        while index < len(self._tokens) and self._tokens[index].startswith(prefix):
+            keys |= self._postings[self._tokens[index]]
+            index += 1
+        return keys
+
+    def suggest(self, q, limit=10):
+        """Return the most popular suggestions whose tokens match every query word as a prefix"""
+        words = tokenize(q)
+        if not words:
+            return []
+        limit = max(1, min(limit, MAX_SUGGESTIONS))
+        self._ensure_built()
+
+        with self._lock:
+            # Match the longest word first, it usually has the fewest postings
+            candidates = None
+            for word in sorted(set(words), key=len, reverse=True):
+                keys = self._prefix_keys(word)
+                candidates = keys if candidates is None else candidates & keys
+                if not candidates:
+                    return []
+
+            ranked = []
+            for key in candidates:
+                suggestion = self._suggestions[key]
+                popularity = sum(self._popularity.get(event_id, 0) for event_id in suggestion['events'])
+                ranked.append((popularity, key, suggestion['label']))
+
+        ranked.sort(key=lambda entry: (-entry[0], len(entry[2]), entry[2].lower()))
+
+        results = []
+        for popularity, (kind, ref), label in ranked[:limit]:
+            result = {'type': kind, 'label': label, 'popularity': popularity}
+            if kind == 'event':
+                result['event_id'] = ref
+            results.append(result)
+        return results
+
+
+event_suggestions = SuggestIndex(
+    rebuild_interval=int(os.getenv('SUGGEST_INDEX_REBUILD_INTERVAL', 600))
+)
@@ -0,0 +1,54 @@
+import base64
+from datetime import datetime
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import selectinload
+from models import Order
+
+# Page size bounds for paginated order history
+DEFAULT_ORDER_PAGE_SIZE = 20
+MAX_ORDER_PAGE_SIZE = 100
+
+
+def encode_cursor(order):
+    """Opaque cursor pointing just after the given order in (created_at, id) order"""
+    raw = f"{order.created_at.isoformat()}|{order.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) for a cursor, raising ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, order_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (UnicodeError, TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def get_order_page(user_id, limit=None, cursor=None):
+    """Return (orders, next_cursor) for a user's order history, newest first.
+
+    Order items are loaded with a single selectinload query for the whole
+    page. When neither limit nor cursor is given the full history is returned
+    and next_cursor is None; otherwise a keyset page on (created_at, id) is
+    returned so its cost doesn't depend on how many orders came before it.
+    """
+    query = Order.query.options(selectinload(Order.order_items)).filter(Order.user_id == user_id)
+    
+    if cursor:
+        created_at, order_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Order.created_at < created_at,
+            and_(Order.created_at == created_at, Order.id < order_id)
+        ))
+    
+    query = query.order_by(Order.created_at.desc(), Order.id.desc())
+    
+    if limit is None and not cursor:
+        return query.all(), None
+    
+    limit = max(1, min(limit or DEFAULT_ORDER_PAGE_SIZE, MAX_ORDER_PAGE_SIZE))
+    # Fetch one extra row to know whether another page exists
+    orders = query.limit(limit + 1).all()
+    next_cursor = encode_cursor(orders[limit - 1]) if len(orders) > limit else None
+    return orders[:limit], next_cursor
@@ -0,0 +1,113 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+# werkzeug's scrypt with its parameters spelled out, so the stored prefix
+# doesn't silently change when werkzeug's own default does
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hashing jobs are already waiting for the pool"""
+
+
+class PasswordHasher:
+    """Password hashing with a configurable method, run on a bounded process pool.
+    
+    method is any werkzeug method string, e.g. "scrypt:32768:8:1" or
+    "pbkdf2:sha256:600000". Hashes are computed in worker processes so a
+    burst of logins uses at most `workers` cores and never holds the GIL of
+    the request threads. At most `max_pending` jobs may be queued; callers
+    past that wait up to `wait_timeout` seconds and then get
+    PasswordHasherBusy. With workers=0 everything runs inline, which suits
+    scripts and the development server.
+    
+    Workers are started with the spawn method, which re-imports the main
+    module in every worker. Under gunicorn that is the small server entry
+    point, but `python app.py` would rebuild the whole app and redo its
+    database bootstrap per worker, so app.py switches to workers=0 when run
+    directly unless PASSWORD_HASH_WORKERS is set.
+    """
+    
+    def __init__(self, method=DEFAULT_METHOD, workers=2, max_pending=None, wait_timeout=10):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending or max(workers, 1) * 8
+        self.wait_timeout = wait_timeout
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._prefix = None
+    
+    @property
+    def prefix(self):
+        """The method prefix werkzeug writes into hashes, with every parameter spelled out"""
+        if self._prefix is None:
+            self._prefix = generate_password_hash('', method=self.method).split('$', 1)[0]
+        return self._prefix
+    
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                # Spawned rather than forked, so workers don't inherit the
+                # app's open database connections and background threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._pool
+    
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            raise PasswordHasherBusy('Password hashing queue is full')
+        try:
+            return self._get_pool().submit(fn, *args).result()
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool next time and finish this job inline
+            with self._pool_lock:
+                self._pool = None
+            return fn(*args)
+        finally:
+            self._slots.release()
+    
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+    
+    def verify(self, password_hash, password):
+        if not password_hash:
+            return False
+        return self._run(check_password_hash, password_hash, password)
+    
+    def needs_rehash(self, password_hash):
+        """True when a stored hash was made with a different method or cost"""
+        return not password_hash or password_hash.split('$', 1)[0] != self.prefix
+    
+    def configure(self, method=None, workers=None):
+        """Switch the method or pool size, e.g. from a benchmark"""
+        self.shutdown()
+        if method is not None:
+            self.method = method
+            self._prefix = None
+        if workers is not None:
+            self.workers = workers
+    
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+password_hasher = PasswordHasher(
+    method=os.getenv('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+    workers=int(os.getenv('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1))),
+    max_pending=int(os.getenv('PASSWORD_HASH_MAX_PENDING', 0)) or None,
+    wait_timeout=float(os.getenv('PASSWORD_HASH_WAIT_TIMEOUT', 10))
+)
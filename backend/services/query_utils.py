@@ -0,0 +1,47 @@
+from datetime import datetime, date
+from sqlalchemy import func, case, cast, Date
+from models import db
+
+
+def month_bucket(column):
+    """SQL expression grouping a date/timestamp column into 'YYYY-MM' month buckets"""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return func.to_char(func.date_trunc('month', column), 'YYYY-MM')
+    if dialect == 'sqlite':
+        return func.strftime('%Y-%m', column)
+    return func.date_format(column, '%Y-%m')
+
+
+def day_bucket(column):
+    """SQL expression truncating a timestamp column to its calendar day"""
+    if db.engine.dialect.name == 'sqlite':
+        return func.date(column)
+    return cast(column, Date)
+
+
+def as_date(value):
+    """Normalize a day_bucket() result (SQLite returns strings) to a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+def last_month_starts(count, now=None):
+    """First day of each of the last `count` calendar months, oldest first"""
+    now = now or datetime.utcnow()
+    year, month = now.year, now.month
+    months = []
+    for _ in range(count):
+        months.insert(0, datetime(year, month, 1))
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+    return months
+
+
+def sum_if(condition, value=1):
+    """SUM(CASE WHEN condition THEN value ELSE 0 END), never NULL"""
+    return func.coalesce(func.sum(case((condition, value), else_=0)), 0)
@@ -0,0 +1,181 @@
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from functools import wraps
+from flask import request, jsonify
+
+
+class MemoryRateLimitStore:
+    """Sliding-window hit log kept in this process.
+    
+    Each key holds the timestamps of its recent hits; a hit is allowed while
+    fewer than `limit` of them fall inside the last `window` seconds. Limits
+    are per worker process, so with several workers the effective limit is
+    multiplied by the worker count; use RedisRateLimitStore to share them.
+    """
+    
+    def __init__(self, sweep_every=1000):
+        self._hits = {}  # key -> (window, deque of monotonic timestamps)
+        self._lock = threading.Lock()
+        self._sweep_every = sweep_every
+        self._calls = 0
+    
+    def hit(self, key, limit, window):
+        """Record a hit if the key is under its limit.
+        
+        Returns (allowed, retry_after) where retry_after is the number of
+        seconds until the oldest hit in the window expires.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._calls += 1
+            if self._calls % self._sweep_every == 0:
+                self._sweep(now)
+            
+            hits = self._hits.get(key, (window, deque()))[1]
+            self._hits[key] = (window, hits)
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            
+            if len(hits) >= limit:
+                return False, hits[0] + window - now
+            hits.append(now)
+            return True, 0
+    
+    def _sweep(self, now):
+        # Drop keys with no hits inside their own window so one-off IPs and
+        # emails don't pile up; windows differ between scopes
+        for key in [key for key, (window, hits) in self._hits.items()
+                    if not hits or hits[-1] <= now - window]:
+            del self._hits[key]
+    
+    def reset(self, key=None):
+        with self._lock:
+            if key is None:
+                self._hits.clear()
+            else:
+                self._hits.pop(key, None)
+
+
+class RedisRateLimitStore:
+    """The same sliding window kept in Redis so every worker shares the counts.
+    
+    Takes any client with the redis-py interface. Each key is a sorted set of
+    hit ids scored by time. One MULTI block trims expired hits, adds this one
+    and counts; a hit that lands over the limit is removed again, so
+    concurrent requests can never overshoot the limit.
+    """
+    
+    def __init__(self, client, prefix='ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+    
+    def hit(self, key, limit, window):
+        key = self.prefix + key
+        now = time.time()
+        member = f"{now}:{uuid.uuid4().hex}"
+        
+        pipe = self.client.pipeline()
+        pipe.zremrangebyscore(key, 0, now - window)
+        pipe.zadd(key, {member: now})
+        pipe.zcard(key)
+        pipe.zrange(key, 0, 0, withscores=True)
+        pipe.expire(key, int(window) + 1)
+        _, _, count, oldest, _ = pipe.execute()
+        
+        if count > limit:
+            self.client.zrem(key, member)
+            return False, oldest[0][1] + window - now
+        return True, 0
+    
+    def reset(self, key=None):
+        if key is None:
+            for stored_key in self.client.scan_iter(match=self.prefix + '*'):
+                self.client.delete(stored_key)
+        else:
+            self.client.delete(self.prefix + key)
+
+
+def parse_limit(value):
+    """Parse a "hits/seconds" limit such as "10/60" into (10, 60.0)"""
+    hits, seconds = value.split('/', 1)
+    return int(hits), float(seconds)
+
+
+class RateLimiter:
+    """Per-IP and per-email throttling for unauthenticated auth endpoints"""
+    
+    def __init__(self, store, enabled=True):
+        self.store = store
+        self.enabled = enabled
+    
+    def check(self, scope, keys):
+        """Record an attempt against each (kind, value, limit, window) key.
+        
+        Returns None when every key is under its limit, otherwise the number of
+        seconds to wait. Keys are checked in order and stop at the first one
+        that is over, so a blocked IP doesn't also use up an email's attempts.
+        """
+        for kind, value, limit, window in keys:
+            if not value:
+                continue
+            allowed, retry_after = self.store.hit(f"{scope}:{kind}:{value}", limit, window)
+            if not allowed:
+                return retry_after
+        return None
+    
+    def limit(self, scope, per_ip, per_email=None):
+        """Decorator rejecting excess attempts with a 429 before the view runs.
+        
+        per_ip and per_email are (hits, seconds) tuples. The email is read from
+        the JSON body and normalised, so the view's own lookups and password
+        checks only run for requests that get through.
+        """
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                
+                keys = [('ip', request.remote_addr, *per_ip)]
+                if per_email:
+                    data = request.get_json(silent=True) or {}
+                    email = data.get('email') if isinstance(data, dict) else None
+                    if isinstance(email, str):
+                        keys.append(('email', email.strip().lower(), *per_email))
+                
+                retry_after = self.check(scope, keys)
+                if retry_after is not None:
+                    response = jsonify({'error': 'Too many attempts. Please try again later.'})
+                    response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+                    return response, 429
+                return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+def store_from_env():
+    """Use Redis when RATE_LIMIT_REDIS_URL is set, otherwise an in-process store"""
+    url = os.getenv('RATE_LIMIT_REDIS_URL')
+    if not url:
+        return MemoryRateLimitStore()
+    
+    import redis  # only needed when a shared store is configured
+    return RedisRateLimitStore(redis.Redis.from_url(url))
+
+
+rate_limiter = RateLimiter(
+    store_from_env(),
+    enabled=os.getenv('RATE_LIMIT_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+)
+
+# Per-IP limits key on request.remote_addr. Behind a reverse proxy set
+# TRUSTED_PROXY_HOPS (see app.py) to the number of proxies in front of the
+# app, otherwise every client shares the proxy's address and the per-IP
+# limit becomes one site-wide limit.
+LOGIN_LIMIT_PER_IP = parse_limit(os.getenv('LOGIN_RATE_LIMIT_PER_IP', '20/60'))
+LOGIN_LIMIT_PER_EMAIL = parse_limit(os.getenv('LOGIN_RATE_LIMIT_PER_EMAIL', '5/60'))
+PASSWORD_RESET_LIMIT_PER_IP = parse_limit(os.getenv('PASSWORD_RESET_RATE_LIMIT_PER_IP', '10/900'))
+PASSWORD_RESET_LIMIT_PER_EMAIL = parse_limit(os.getenv('PASSWORD_RESET_RATE_LIMIT_PER_EMAIL', '3/900'))
@@ -0,0 +1,197 @@
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from models import (db, User, Event, Order, OrderItem, DailyRevenue, DailyOrderStatus,
+                    DailyCategorySales, DailyEventSales, DailySignups)
+from services.query_utils import day_bucket, as_date, sum_if
+
+ROLLUP_MODELS = (DailyRevenue, DailyOrderStatus, DailyCategorySales, DailyEventSales, DailySignups)
+
+
+UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def increment(model, keys, **deltas):
+    """Add deltas to the rollup row identified by keys, creating it if needed.
+
+    On PostgreSQL and SQLite this is one INSERT ... ON CONFLICT DO UPDATE.
+    Elsewhere it is a single UPDATE so concurrent writers can't lose counts,
+    and a row created concurrently by another transaction is retried as an
+    update. Runs in the caller's transaction and does not commit.
+    """
+    if db.engine.dialect.name in UPSERT_INSERTS:
+        increment_many(model, list(keys), [{**keys, **deltas}])
+        return
+    
+    query = model.query.filter_by(**keys)
+    values = {getattr(model, column): getattr(model, column) + delta for column, delta in deltas.items()}
+    
+    if query.update(values, synchronize_session=False):
+        return
+    
+    try:
+        with db.session.begin_nested():
+            db.session.add(model(**keys, **deltas))
+    except IntegrityError:
+        query.update(values, synchronize_session=False)
+
+
+def increment_many(model, key_columns, rows):
+    """Apply a batch of increments to a rollup table with a fixed number of queries.
+
+    rows are dicts of key and delta columns. Rows sharing a key are summed
+    first, then PostgreSQL and SQLite write everything as one executemany
+    INSERT ... ON CONFLICT DO UPDATE adding the deltas to the stored values,
+    so the query count doesn't grow with the number of order lines. Other
+    databases fall back to one increment() per key. Does not commit.
+    """
+    totals = {}
+    for row in rows:
+        key = tuple(row[column] for column in key_columns)
+        total = totals.setdefault(key, dict.fromkeys((c for c in row if c not in key_columns), 0))
+        for column, delta in row.items():
+            if column not in key_columns:
+                total[column] += delta
+    if not totals:
+        return
+    
+    insert = UPSERT_INSERTS.get(db.engine.dialect.name)
+    if insert is None:
+        for key, deltas in totals.items():
+            increment(model, dict(zip(key_columns, key)), **deltas)
+        return
+    
+    table = model.__table__
+    delta_columns = next(iter(totals.values())).keys()
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c[column] for column in key_columns],
+        set_={column: table.c[column] + statement.excluded[column] for column in delta_columns}
+    )
+    db.session.execute(statement, [
+        {**dict(zip(key_columns, key)), **deltas} for key, deltas in totals.items()
+    ])
+
+
+def order_day(order):
+    return (order.created_at or datetime.utcnow()).date()
+
+
+def order_lines(order):
+    """(event_id, category, amount) for each line of an existing order, in one query"""
+    return db.session.query(
+        OrderItem.event_id,
+        Event.category,
+        OrderItem.price * OrderItem.quantity
+    ).join(Event, Event.id == OrderItem.event_id)\
+     .filter(OrderItem.order_id == order.id).all()
+
+
+def rollup_order_created(order, lines):
+    """Add a new order to the rollups.
+
+    lines is a list of (event_id, category, amount) tuples for the order's
+    items, which the caller already has at hand.
+    """
+    day = order_day(order)
+    status = order.status or 'pending'
+    active = 1 if status != 'cancelled' else 0
+    
+    increment(DailyRevenue, {'day': day}, order_count=1, revenue=order.total_amount * active)
+    increment(DailyOrderStatus, {'day': day, 'status': status}, order_count=1)
+    
+    increment_many(DailyEventSales, ('day', 'event_id'), [
+        {'day': day, 'event_id': event_id, 'order_count': 1,
+         'active_order_count': active, 'revenue': amount * active}
+        for event_id, category, amount in lines
+    ])
+    if active:
+        increment_many(DailyCategorySales, ('day', 'category'), [
+            {'day': day, 'category': category, 'order_count': 1, 'revenue': amount}
+            for event_id, category, amount in lines
+        ])
+
+
+def rollup_order_status_change(order, old_status):
+    """Move an order between statuses, adding or removing its revenue when it
+    is cancelled or un-cancelled"""
+    if old_status == order.status:
+        return
+    
+    day = order_day(order)
+    increment(DailyOrderStatus, {'day': day, 'status': old_status}, order_count=-1)
+    increment(DailyOrderStatus, {'day': day, 'status': order.status}, order_count=1)
+    
+    was_active = old_status != 'cancelled'
+    is_active = order.status != 'cancelled'
+    if was_active == is_active:
+        return
+    
+    sign = 1 if is_active else -1
+    increment(DailyRevenue, {'day': day}, revenue=sign * order.total_amount)
+    lines = order_lines(order)
+    increment_many(DailyEventSales, ('day', 'event_id'), [
+        {'day': day, 'event_id': event_id, 'active_order_count': sign, 'revenue': sign * amount}
+        for event_id, category, amount in lines
+    ])
+    increment_many(DailyCategorySales, ('day', 'category'), [
+        {'day': day, 'category': category, 'order_count': sign, 'revenue': sign * amount}
+        for event_id, category, amount in lines
+    ])
+
+
+def rollup_signup(user, delta=1):
+    """Count a new (or, with delta=-1, deleted) non-admin user on their signup day"""
+    if user.is_admin:
+        return
+    day = (user.created_at or datetime.utcnow()).date()
+    increment(DailySignups, {'day': day}, signups=delta)
+
+
+def rebuild_rollups():
+    """Recompute every rollup table from the source tables (does not commit)"""
+    for model in ROLLUP_MODELS:
+        model.query.delete(synchronize_session=False)
+    
+    order_day_expr = day_bucket(Order.created_at)
+    not_cancelled = Order.status != 'cancelled'
+    line_amount = OrderItem.price * OrderItem.quantity
+    
+    rows = []
+    for day, order_count, revenue in db.session.query(
+        order_day_expr, func.count(Order.id), sum_if(not_cancelled, Order.total_amount)
+    ).group_by(order_day_expr):
+        rows.append(DailyRevenue(day=as_date(day), order_count=order_count, revenue=float(revenue)))
+    
+    for day, status, order_count in db.session.query(
+        order_day_expr, Order.status, func.count(Order.id)
+    ).group_by(order_day_expr, Order.status):
+        rows.append(DailyOrderStatus(day=as_date(day), status=status, order_count=order_count))
+    
+    for day, category, order_count, revenue in db.session.query(
+        order_day_expr, Event.category, func.count(OrderItem.id), func.sum(line_amount)
+    ).join(OrderItem, OrderItem.order_id == Order.id)\
+     .join(Event, Event.id == OrderItem.event_id)\
+     .filter(not_cancelled)\
+     .group_by(order_day_expr, Event.category):
+        rows.append(DailyCategorySales(day=as_date(day), category=category,
+                                       order_count=order_count, revenue=float(revenue or 0)))
+    
+    for day, event_id, order_count, active_order_count, revenue in db.session.query(
+        order_day_expr, OrderItem.event_id, func.count(OrderItem.id),
+        sum_if(not_cancelled), sum_if(not_cancelled, line_amount)
+    ).join(OrderItem, OrderItem.order_id == Order.id)\
+     .group_by(order_day_expr, OrderItem.event_id):
+        rows.append(DailyEventSales(day=as_date(day), event_id=event_id, order_count=order_count,
+                                    active_order_count=active_order_count, revenue=float(revenue)))
+    
+    signup_day = day_bucket(User.created_at)
+    for day, signups in db.session.query(
+        signup_day, func.count(User.id)
+    ).filter(User.is_admin == False, User.created_at.isnot(None))\
+     .group_by(signup_day):
+        rows.append(DailySignups(day=as_date(day), signups=signups))
+    
+    db.session.add_all(rows)
+    return len(rows)
@@ -0,0 +1,91 @@
+from datetime import datetime
+from sqlalchemy import func, case
+from models import db, Order, UserStats
+
+
+def order_contribution(status, total_amount):
+    """(orders, pending, spent) that a single order adds to its user's stats"""
+    pending = 1 if status == 'pending' else 0
+    spent = total_amount if status != 'cancelled' else 0.0
+    return 1, pending, spent
+
+
+def compute_user_stats(user_id=None):
+    """Aggregate order totals straight from the orders table, grouped by user"""
+    query = db.session.query(
+        Order.user_id,
+        func.count(Order.id),
+        func.coalesce(func.sum(case((Order.status == 'pending', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Order.status != 'cancelled', Order.total_amount), else_=0)), 0)
+    )
+    if user_id is not None:
+        query = query.filter(Order.user_id == user_id)
+    return query.group_by(Order.user_id).all()
+
+
+def refresh_user_stats(user_id):
+    """Recompute one user's stats row from the orders table (does not commit)"""
+    rows = compute_user_stats(user_id)
+    total_orders, pending_orders, total_spent = rows[0][1:] if rows else (0, 0, 0.0)
+    
+    stats = UserStats.query.get(user_id)
+    if not stats:
+        stats = UserStats(user_id=user_id)
+        db.session.add(stats)
+    stats.total_orders = int(total_orders)
+    stats.pending_orders = int(pending_orders)
+    stats.total_spent = float(total_spent)
+    stats.updated_at = datetime.utcnow()
+    return stats
+
+
+def apply_user_stats_delta(user_id, orders=0, pending=0, spent=0.0):
+    """Add deltas to a user's stats in the current transaction (does not commit).
+
+    The increment runs as a single UPDATE so concurrent order writes for the
+    same user can't lose updates. Users without a stats row yet get one
+    computed from the orders table, which already includes the pending change
+    because the session autoflushes before querying.
+    """
+    updated = UserStats.query.filter_by(user_id=user_id).update({
+        UserStats.total_orders: UserStats.total_orders + orders,
+        UserStats.pending_orders: UserStats.pending_orders + pending,
+        UserStats.total_spent: UserStats.total_spent + spent,
+        UserStats.updated_at: datetime.utcnow()
+    }, synchronize_session=False)
+    
+    if not updated:
+        refresh_user_stats(user_id)
+
+
+def record_order_created(order):
+    orders, pending, spent = order_contribution(order.status or 'pending', order.total_amount)
+    apply_user_stats_delta(order.user_id, orders=orders, pending=pending, spent=spent)
+
+
+def record_order_status_change(order, old_status):
+    if old_status == order.status:
+        return
+    _, old_pending, old_spent = order_contribution(old_status, order.total_amount)
+    _, new_pending, new_spent = order_contribution(order.status, order.total_amount)
+    apply_user_stats_delta(order.user_id, pending=new_pending - old_pending, spent=new_spent - old_spent)
+
+
+def rebuild_all_user_stats():
+    """Backfill every user's stats row from the orders table (does not commit)"""
+    totals = {row[0]: row[1:] for row in compute_user_stats()}
+    existing = {stats.user_id: stats for stats in UserStats.query.all()}
+    now = datetime.utcnow()
+    
+    for user_id in set(totals) | set(existing):
+        total_orders, pending_orders, total_spent = totals.get(user_id, (0, 0, 0.0))
+        stats = existing.get(user_id)
+        if not stats:
+            stats = UserStats(user_id=user_id)
+            db.session.add(stats)
+        stats.total_orders = int(total_orders)
+        stats.pending_orders = int(pending_orders)
+        stats.total_spent = float(total_spent)
+        stats.updated_at = now
+    
+    return len(totals)
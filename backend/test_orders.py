@@ -0,0 +1,54 @@
+from app import app
+from models import db, User, Event, Order
+from services.auth_tokens import issue_access_token
+
+ORDER_FIELDS = {
+    'shipping_address': '1 MG Road',
+    'shipping_city': 'Bengaluru',
+    'shipping_state': 'Karnataka',
+    'shipping_pincode': '560001',
+    'payment_method': 'card'
+}
+
+def test_create_order_rejects_invalid_quantity():
+    print("Testing order quantity validation...")
+    
+    with app.app_context():
+        # Clean up test data if it exists
+        user = User.query.filter_by(email="order-quantity-test@example.com").first()
+        if user:
+            db.session.delete(user)
+        Event.query.filter_by(title="Order Quantity Test Event").delete()
+        db.session.commit()
+        
+        user = User(email="order-quantity-test@example.com", first_name="Order", last_name="Test",
+                    phone="1234567890")
+        user.set_password("password123")
+        event = Event(title="Order Quantity Test Event", description="Test event", location="Bengaluru",
+                      date="June 30, 2025", category="birthday", price=10.0)
+        db.session.add_all([user, event])
+        db.session.commit()
+        
+        headers = {'Authorization': f'Bearer {issue_access_token(user)}'}
+        client = app.test_client()
+        
+        try:
+            for quantity in [-5, 0, 2.5, "two", True]:
+                response = client.post('/api/orders', headers=headers, json={
+                    **ORDER_FIELDS,
+                    'items': [{'event_id': event.id, 'quantity': quantity}]
+                })
+                print(f"quantity={quantity!r}: {response.status_code} {response.get_json()}")
+                assert response.status_code == 400, f"quantity {quantity!r} was accepted"
+                assert 'Quantity' in response.get_json()['error']
+            
+            assert Order.query.filter_by(user_id=user.id).count() == 0
+        finally:
+            db.session.delete(user)
+            db.session.delete(event)
+            db.session.commit()
+    
+    print("✅ Invalid quantities are rejected")
+
+if __name__ == "__main__":
+    test_create_order_rejects_invalid_quantity()
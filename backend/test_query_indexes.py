@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Check that the main query of each hot route is served by an index.
+
+Runs EXPLAIN against the configured database (EXPLAIN QUERY PLAN on SQLite).
+On PostgreSQL sequential scans are disabled for the check, since the planner
+legitimately prefers them on small tables.
+"""
+
+from datetime import datetime
+from app import app, db
+from models import (User, Event, EventItem, Order, OrderItem, Cart, CartItem,
+                    PaymentMethod, Address, Wishlist, PasswordReset)
+from sqlalchemy import select, text
+
+SINCE = datetime(2024, 1, 1)
+
+# (route, statement, index expected in the plan; None accepts any index)
+CASES = [
+    ('GET /api/orders (history page)',
+     select(Order).where(Order.user_id == 1).order_by(Order.created_at.desc(), Order.id.desc()).limit(21),
+     'ix_orders_user_created'),
+    ('GET /api/admin/orders?status=',
+     select(Order).where(Order.status.in_(['pending'])).order_by(Order.created_at.desc()).limit(51),
+     'ix_orders_status_created'),
+    ('GET /api/admin/orders?from=',
+     select(Order).where(Order.created_at >= SINCE).order_by(Order.created_at.desc(), Order.id.desc()).limit(51),
+     'ix_orders_created_at'),
+    ('order items for a page of orders',
+     select(OrderItem).where(OrderItem.order_id.in_([1, 2, 3])),
+     'ix_order_items_order_id'),
+    ('DELETE /api/admin/events/<id> (order check)',
+     select(OrderItem).where(OrderItem.event_id == 1),
+     'ix_order_items_event_id'),
+    ('GET /api/cart',
+     select(Cart).where(Cart.user_id == 1),
+     'ix_carts_user_id'),
+    ('POST /api/cart/add (existing line)',
+     select(CartItem).where(CartItem.cart_id == 1, CartItem.event_id == 1),
+     'uq_cart_items_cart_event'),
+    ('cart lines for an event',
+     select(CartItem).where(CartItem.event_id == 1),
+     'ix_cart_items_event_id'),
+    ('GET /api/events/<id>/items',
+     select(EventItem).where(EventItem.event_id == 1),
+     'ix_event_items_event_id'),
+    ('GET /api/events?category=',
+     select(Event).where(Event.category == 'birthday', Event.id > 0).order_by(Event.id).limit(20),
+     'ix_events_category_id'),
+    ('GET /api/events/upcoming',
+     select(Event).where(Event.starts_at >= SINCE).order_by(Event.starts_at, Event.id).limit(10),
+     'ix_events_starts_at'),
+    ('GET /api/users/me/addresses',
+     select(Address).where(Address.user_id == 1),
+     'ix_addresses_user_id'),
+    ('GET /api/users/me/payment-methods',
+     select(PaymentMethod).where(PaymentMethod.user_id == 1),
+     'ix_payment_methods_user_id'),
+    ('GET /api/users/me/wishlist',
+     select(Wishlist).where(Wishlist.user_id == 1),
+     None),
+    ('POST /api/auth/request-password-reset',
+     select(PasswordReset).where(PasswordReset.email == 'user@example.com'),
+     'ix_password_resets_email'),
+    ('POST /api/auth/reset-password/<token>',
+     select(PasswordReset).where(PasswordReset.token == 'token', PasswordReset.used == False),
+     None),
+    ('POST /api/auth/login',
+     select(User).where(User.email == 'user@example.com'),
+     None),
+    ('signup rollup rebuild',
+     select(User).where(User.created_at >= SINCE),
+     'ix_users_created_at'),
+]
+
+def explain(conn, query):
+    sql = str(query.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+    if db.engine.dialect.name == 'sqlite':
+        rows = conn.execute(text('EXPLAIN QUERY PLAN ' + sql)).all()
+        return '\n'.join(row[-1] for row in rows)
+    rows = conn.execute(text('EXPLAIN ' + sql)).all()
+    return '\n'.join(row[0] for row in rows)
+
+def uses_index(plan, index_name):
+    if index_name is not None:
+        return index_name in plan
+    return 'INDEX' in plan.upper()
+
+def test_query_indexes():
+    with app.app_context():
+        print(f"Checking query plans on {db.engine.dialect.name}...")
+        
+        failures = []
+        with db.engine.connect() as conn:
+            if db.engine.dialect.name == 'postgresql':
+                conn.execute(text('SET enable_seqscan = off'))
+            
+            for route, query, index_name in CASES:
+                plan = explain(conn, query)
+                if uses_index(plan, index_name):
+                    print(f"✅ {route}: {index_name or 'index'}")
+                else:
+                    print(f"❌ {route}: expected {index_name or 'an index'}")
+                    print('   ' + plan.replace('\n', '\n   '))
+                    failures.append(f"{route} (expected {index_name or 'an index'})")
+            
+            conn.rollback()
+    
+    assert not failures, (
+        f"{len(failures)} of {len(CASES)} queries are not using their index: " + '; '.join(failures)
+    )
+    print(f"\n✅ All {len(CASES)} queries use an index")
+
+if __name__ == "__main__":
+    test_query_indexes()